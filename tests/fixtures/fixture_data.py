@@ -45,3 +45,10 @@ def few_posts_with_group(mixer, user, group):
 def another_few_posts_with_group_with_follower(mixer, user, another_user, group):
     mixer.blend('posts.Follow', user=user, author=another_user)
     mixer.cycle(20).blend(Post, author=another_user, group=group)
+
+
+@pytest.fixture(autouse=True)
+def sync_thumbnails(settings):
+    """Миниатюры создаются в том же запросе, а не в фоновом потоке,
+    который может пережить временный MEDIA_ROOT теста."""
+    settings.THUMBNAIL_WORKERS = 0
@@ -0,0 +1,24 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def assert_max_queries():
+    """Проверяет, что запрос к url укладывается в бюджет SQL-запросов.
+
+    Использование: ``assert_max_queries(client, '/', 5)``.
+    """
+    def check(client, url, budget):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Страница `{url}` вернула код {response.status_code}'
+        )
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        assert len(context) <= budget, (
+            f'Страница `{url}` выполнила {len(context)} SQL-запросов '
+            f'при бюджете {budget}:\n{queries}'
+        )
+        return response
+    return check
@@ -0,0 +1,56 @@
+import pytest
+from django.core.cache import cache
+
+from posts.models import Comment, Follow, Group, Post
+
+pytestmark = [pytest.mark.django_db]
+
+# Бюджеты SQL-запросов на страницу; не зависят от объема данных.
+# Первый запрос каждой страницы - расчет ETag (posts/etags.py)
+BUDGETS = {
+    'index': 3,
+    'group': 4,
+    'profile': 7,
+    'detail': 5,
+    'follow': 5,
+}
+
+
+@pytest.fixture
+def big_feed(mixer, user, another_user):
+    """Лента, где у каждого поста свой автор и своя группа,
+    а у поста с комментариями - много разных комментаторов."""
+    authors = mixer.cycle(15).blend('auth.User')
+    groups = mixer.cycle(15).blend(Group)
+    for author, group in zip(authors, groups):
+        Follow.objects.create(user=user, author=author)
+        mixer.cycle(2).blend(Post, author=author, group=group, image='')
+    mixer.cycle(15).blend(Post, author=another_user, group=groups[0], image='')
+    post = Post.objects.filter(author=another_user).first()
+    for author in authors:
+        Comment.objects.create(post=post, author=author, text='Комментарий')
+    cache.clear()
+    return post
+
+
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('page', ['', '?page=2'])
+    def test_index(self, client, big_feed, assert_max_queries, page):
+        assert_max_queries(client, f'/{page}', BUDGETS['index'])
+
+    def test_group(self, client, big_feed, assert_max_queries):
+        url = f'/group/{big_feed.group.slug}/'
+        assert_max_queries(client, url, BUDGETS['group'])
+
+    def test_profile(self, user_client, big_feed, assert_max_queries):
+        url = f'/profile/{big_feed.author.username}/'
+        assert_max_queries(user_client, url, BUDGETS['profile'])
+
+    def test_detail(self, user_client, big_feed, assert_max_queries):
+        url = f'/posts/{big_feed.pk}/'
+        response = assert_max_queries(user_client, url, BUDGETS['detail'])
+        assert len(response.context['comments']) == 15
+
+    def test_follow(self, user_client, big_feed, assert_max_queries):
+        assert_max_queries(user_client, '/follow/', BUDGETS['follow'])
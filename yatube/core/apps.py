@@ -3,3 +3,14 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.conf import settings
+        from django.core.signals import request_started
+        from django.db.backends.signals import connection_created
+
+        from . import db, timing
+        connection_created.connect(db.configure_sqlite)
+        request_started.connect(db.check_connections)
+        if settings.SERVER_TIMING_SAMPLE_RATE:
+            timing.install()
@@ -0,0 +1,90 @@
+import math
+import random
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from django.core.cache import cache
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'pylibmc': 'django.core.cache.backends.memcached.PyLibMCCache',
+    # требует пакет django-redis
+    'redis': 'django_redis.cache.RedisCache',
+}
+# сколько секунд ждать, пока другой процесс строит значение
+LOCK_TIMEOUT: int = 10
+WAIT_STEP: float = 0.05
+
+
+def cache_from_url(url):
+    """Настройки CACHES['default'] из строки вида
+    ``file:///var/tmp/yatube``, ``memcached://127.0.0.1:11211``,
+    ``redis://127.0.0.1:6379/1`` или ``locmem://``."""
+    parts = urlsplit(url)
+    if parts.scheme not in BACKENDS:
+        raise ValueError(f'Неизвестный кэш: {url}')
+    if parts.scheme == 'file':
+        location = parts.path
+    elif parts.scheme == 'redis':
+        location = url
+    else:
+        location = parts.netloc
+    return {'BACKEND': BACKENDS[parts.scheme], 'LOCATION': location}
+
+
+def bump_version(name):
+    """Делает устаревшими все ключи, построенные с версией name."""
+    try:
+        cache.incr(f'version:{name}')
+    except ValueError:
+        cache.set(f'version:{name}', 2, None)
+
+
+def get_or_build(key, build, timeout, beta=1.0):
+    """cache.get_or_set с защитой от одновременного пересчета.
+
+    Значение хранится вместе со временем его построения (delta) и
+    сроком годности. Чем ближе срок, тем вероятнее, что очередной
+    запрос пересчитает значение заранее (вероятностное раннее
+    истечение, XFetch); пересчитывает только процесс, взявший
+    блокировку, остальные отдают прежнее значение. Если значения нет
+    вовсе, остальные процессы ждут того, кто его строит.
+    """
+    lock_key = f'lock:{key}'
+    # значение блокировки - метка владельца: снять ее может только он
+    token = uuid.uuid4().hex
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires = entry
+        early = delta * beta * math.log(random.random() or 1e-12)
+        if time.time() - early < expires:
+            return value
+        if not cache.add(lock_key, token, LOCK_TIMEOUT):
+            return value
+        locked = True
+    else:
+        locked = cache.add(lock_key, token, LOCK_TIMEOUT)
+        deadline = time.time() + LOCK_TIMEOUT
+        while not locked and time.time() < deadline:
+            time.sleep(WAIT_STEP)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+            # строивший процесс упал, не положив значение: строит
+            # тот, кто первым возьмет освободившуюся блокировку
+            locked = cache.add(lock_key, token, LOCK_TIMEOUT)
+        # если строивший процесс не уложился, строим сами без блокировки
+    try:
+        start = time.time()
+        value = build()
+        delta = time.time() - start
+        cache.set(key, (value, delta, time.time() + timeout), timeout)
+    finally:
+        # построение дольше LOCK_TIMEOUT: блокировка истекла и могла
+        # достаться другому процессу - ее не трогаем
+        if locked and cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    return value
@@ -0,0 +1,171 @@
+"""Урезание таблицы стилей до селекторов, которые есть в шаблонах.
+
+Из всех шаблонов собираются слова (как у PurgeCSS: любые
+последовательности букв, цифр, «-» и «_»), и из стилей остаются только
+правила, все классы и id селектора которых среди этих слов. Селекторы
+из одних тегов и псевдоклассов (reboot, :root) остаются всегда,
+@media и @supports урезаются рекурсивно, @keyframes остаются, только
+если на них ссылаются оставшиеся правила. Это же урезание по шаблонам
+первого экрана (CRITICAL_TEMPLATES) дает стили, которые встраиваются
+в base.html. Собирает файлы команда purge_css.
+"""
+import re
+from pathlib import Path
+
+from django.conf import settings
+
+# шаблоны того, что видно до первой прокрутки на любой странице
+CRITICAL_TEMPLATES = ('base.html', 'includes/header.html')
+# шаблон со встроенными стилями, который пишет purge_css
+CRITICAL_OUTPUT = 'includes/critical_css.html'
+# блоки, внутри которых обычные правила
+NESTED_AT_RULES = ('media', 'supports')
+
+WORD = re.compile(r'[\w-]+')
+CLASS_OR_ID = re.compile(r'[.#](-?[_a-zA-Z][\w-]*)')
+KEYFRAMES = re.compile(r'@(?:-webkit-)?keyframes\s+([\w-]+)')
+
+
+def _skip_string(css, i):
+    """Позиция за строкой в кавычках, начинающейся в i."""
+    quote = css[i]
+    i += 1
+    while css[i] != quote:
+        i += 2 if css[i] == '\\' else 1
+    return i + 1
+
+
+def _tokens(css):
+    """(позиция, знак, конец) для «{», «}» и «;» вне строк и для
+    комментариев (знак '/*')."""
+    i = 0
+    while i < len(css):
+        char = css[i]
+        if char in '"\'':
+            i = _skip_string(css, i)
+        elif css.startswith('/*', i):
+            end = css.index('*/', i + 2) + 2
+            yield i, '/*', end
+            i = end
+        else:
+            if char in '{};':
+                yield i, char, i + 1
+            i += 1
+
+
+def split(css):
+    """Правила верхнего уровня: [(заголовок, тело)]. У @-инструкций
+    без блока (@charset) и комментариев-лицензий /*! тело None,
+    остальные комментарии пропускаются."""
+    items = []
+    start = head_end = depth = 0
+    for i, token, end in _tokens(css):
+        if token == '/*' and depth == 0:
+            if css.startswith('/*!', i):
+                items.append((css[i:end], None))
+            start = end
+        elif token == '{':
+            if depth == 0:
+                head_end = i
+            depth += 1
+        elif token == '}':
+            depth -= 1
+            if depth == 0:
+                items.append(
+                    (css[start:head_end].strip(), css[head_end + 1:i]))
+                start = end
+        elif token == ';' and depth == 0:
+            items.append((css[start:end].strip(), None))
+            start = end
+    return items
+
+
+def split_selectors(head):
+    """Селекторы списка через запятую (запятые в скобках не делят)."""
+    selectors = []
+    start = depth = 0
+    for i, char in enumerate(head):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(head[start:i].strip())
+            start = i + 1
+    selectors.append(head[start:].strip())
+    return selectors
+
+
+def is_used(selector, words):
+    """Все классы и id селектора встречаются в шаблонах. Аргументы
+    псевдоклассов (:not(.active)) и атрибуты ([type=button]) не
+    учитываются."""
+    previous = None
+    while previous != selector:
+        previous = selector
+        selector = re.sub(r'\([^()]*\)|\[[^\]]*\]', '', selector)
+    return all(name in words for name in CLASS_OR_ID.findall(selector))
+
+
+def _purge(css, words):
+    rules = []
+    for head, body in split(css):
+        if body is None:
+            rules.append(head)
+        elif head.startswith('@'):
+            name = WORD.match(head, 1)
+            if name and name.group().lower() in NESTED_AT_RULES:
+                inner = _purge(body, words)
+                if inner:
+                    rules.append(f'{head}{{{inner}}}')
+            else:
+                rules.append(f'{head}{{{body}}}')
+        else:
+            selectors = [
+                selector for selector in split_selectors(head)
+                if is_used(selector, words)
+            ]
+            if selectors:
+                rules.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(rules)
+
+
+def purge(css, words):
+    """Стили css без правил, не нужных шаблонам со словами words."""
+    css = _purge(css, words)
+    # анимации, на которые больше ничего не ссылается
+    rules = []
+    for head, body in split(css):
+        match = KEYFRAMES.match(head)
+        if match and body is not None:
+            used = re.search(
+                rf'animation[\w-]*:[^;}}]*\b{re.escape(match.group(1))}\b',
+                css,
+            )
+            if not used:
+                continue
+        rules.append(head if body is None else f'{head}{{{body}}}')
+    return ''.join(rules)
+
+
+def template_dirs():
+    """Каталоги шаблонов проекта (без шаблонов сторонних пакетов)."""
+    dirs = []
+    for engine in settings.TEMPLATES:
+        dirs += [Path(directory) for directory in engine.get('DIRS', ())]
+    return dirs
+
+
+def template_words(names=None):
+    """Слова из шаблонов names (относительно каталогов шаблонов) или из
+    всех шаблонов проекта."""
+    words = set()
+    for directory in template_dirs():
+        if names is None:
+            paths = directory.rglob('*.html')
+        else:
+            paths = (directory / name for name in names)
+        for path in paths:
+            if path.is_file() and path != directory / CRITICAL_OUTPUT:
+                words.update(WORD.findall(path.read_text(encoding='utf-8')))
+    return words
@@ -0,0 +1,176 @@
+import contextlib
+import contextvars
+import functools
+import random
+import sqlite3
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.transaction import TransactionManagementError
+
+# приложения, запись в которые не привязывает читателя к основной базе:
+# сессии и миниатюры пишутся и при обычном чтении страниц
+UNPINNED_APPS = ('sessions', 'thumbnail')
+PIN_COOKIE = 'primary_db'
+
+
+class Routing:
+    """Состояние маршрутизации на время одного запроса."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.replicas = False
+        self.wrote = False
+
+
+routing = contextvars.ContextVar('routing', default=None)
+
+
+class ReplicaRouter:
+    """Чтение во views, помеченных replica_reads, уходит на случайную
+    реплику из DATABASE_REPLICAS, все записи и прочее чтение - на
+    основную базу. Пользователь, который только что писал, читает
+    с основной базы READ_YOUR_WRITES_SECONDS секунд (см.
+    core/middleware.py), чтобы не увидеть реплику без своих правок."""
+
+    def db_for_read(self, model, **hints):
+        state = routing.get()
+        if (state is None or not state.replicas or state.pinned
+                or not settings.DATABASE_REPLICAS):
+            return None
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = routing.get()
+        if state is not None and model._meta.app_label not in UNPINNED_APPS:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def replica_reads(view):
+    """Разрешает view читать с реплик."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = routing.get()
+        if state is None:
+            return view(request, *args, **kwargs)
+        previous, state.replicas = state.replicas, True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state.replicas = previous
+    return wrapper
+
+
+@contextlib.contextmanager
+def primary_reads():
+    """Внутри блока все чтение идет с основной базы, даже во views с
+    replica_reads. Так строятся записи кэша с версией ленты в ключе:
+    версия сдвигается сразу после записи, а реплика может еще отставать,
+    и ее устаревшие данные легли бы в кэш под новой версией."""
+    state = routing.get()
+    if state is None:
+        yield
+        return
+    previous, state.pinned = state.pinned, True
+    try:
+        yield
+    finally:
+        state.pinned = previous
+
+
+def apply_pragmas(cursor, pragmas):
+    """Выполняет PRAGMA из словаря {имя: значение}."""
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created: настраивает новое соединение SQLite по
+    SQLITE_PRAGMAS (WAL, synchronous, кэш страниц, ожидание блокировки)."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
+
+
+def check_connections(**kwargs):
+    """request_started: закрывает постоянные соединения (CONN_MAX_AGE),
+    которые перестали отвечать, чтобы запрос открыл новое. Проверка
+    идет мимо курсоров Django и не попадает в счетчики запросов."""
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        try:
+            connection.connection.cursor().execute('SELECT 1')
+        except connection.Database.Error:
+            connection.close()
+
+
+def sync_replicas(using='default'):
+    """Заменитель репликации для локальной разработки: копирует
+    основную базу SQLite в файлы реплик через backup API."""
+    source = connections[using]
+    if source.in_atomic_block:
+        # backup ждет конца открытой транзакции того же соединения
+        raise TransactionManagementError(
+            'sync_replicas нельзя вызывать внутри транзакции'
+        )
+    source.ensure_connection()
+    for alias in settings.DATABASE_REPLICAS:
+        name = connections[alias].settings_dict['NAME']
+        if name == source.settings_dict['NAME']:
+            # реплика-зеркало (например, в тестах)
+            continue
+        connections[alias].close()
+        target = sqlite3.connect(name)
+        try:
+            source.connection.backup(target)
+        finally:
+            target.close()
+
+
+def estimated_count(model, using='default'):
+    """Примерное число строк таблицы модели из статистики СУБД, без
+    COUNT(*). На SQLite - из sqlite_stat1 (после ANALYZE), а без нее -
+    наибольший id; на остальных СУБД - точный COUNT(*)."""
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+        params = [table]
+    elif connection.vendor == 'sqlite':
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                    [table],
+                )
+                row = cursor.fetchone()
+            if row:
+                return int(row[0].split()[0])
+        except DatabaseError:
+            # ANALYZE еще не выполнялся
+            pass
+        sql = 'SELECT MAX({}) FROM {}'.format(
+            connection.ops.quote_name(model._meta.pk.column),
+            connection.ops.quote_name(table),
+        )
+        params = []
+    else:
+        return model._default_manager.using(using).count()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return int(row[0] or 0) if row else 0
@@ -0,0 +1,183 @@
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.urls import Resolver404, resolve
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import timing
+from .db import PIN_COOKIE, Routing, routing
+from .static import ENCODINGS, accepted_encodings
+
+logger = logging.getLogger('yatube.timing')
+
+
+class ReadYourWritesMiddleware:
+    """Заводит состояние маршрутизации баз на время запроса.
+
+    Запрос с кукой PIN_COOKIE читает только с основной базы. Кука
+    ставится на READ_YOUR_WRITES_SECONDS секунд после запроса, который
+    что-то записал (пост, комментарий, подписку).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = Routing(pinned=PIN_COOKIE in request.COOKIES)
+        token = routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing.reset(token)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class ServerTimingMiddleware:
+    """Для доли запросов SERVER_TIMING_SAMPLE_RATE замеряет общее время,
+    SQL, рендер шаблонов, чтения кэша и создание миниатюр (core/timing.py)
+    и отдает их в заголовке Server-Timing и строкой JSON в лог
+    yatube.timing. Стоит первым, чтобы общее время включало остальные
+    middleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        measure = timing.Timing()
+        token = timing.current.set(measure)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timing.sql_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            timing.current.reset(token)
+        total = measure.total
+        response['Server-Timing'] = self.header(measure, total)
+        logger.info(json.dumps({
+            'view': self.view_name(request),
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            **{
+                f'{name}_ms': round(seconds * 1000, 2)
+                for name, seconds in measure.durations.items()
+                if not name.startswith('cache')
+            },
+            **{f'{name}_count': count
+               for name, count in measure.counts.items()},
+        }, sort_keys=True))
+        return response
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            # страница из кэша отдана до разбора адреса
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                return None
+        return match.view_name
+
+    @staticmethod
+    def header(measure, total):
+        metrics = [f'total;dur={total * 1000:.1f}']
+        for name in ('sql', 'template', 'thumbnails'):
+            if measure.counts.get(name):
+                metrics.append(
+                    f'{name};dur={measure.durations[name] * 1000:.1f};'
+                    f'desc="{measure.counts[name]}"'
+                )
+        hits = measure.counts.get('cache_hit', 0)
+        misses = measure.counts.get('cache_miss', 0)
+        metrics.append(f'cache;desc="hit={hits} miss={misses}"')
+        return ', '.join(metrics)
+
+
+class StaticFilesMiddleware:
+    """Раздает собранную статику из STATIC_ROOT, когда перед приложением
+    нет фронтенд-сервера (SERVE_STATIC).
+
+    Из заранее сжатых копий (core/static.py) выбирается .br или .gz,
+    если клиент их принимает. Файлы с хэшем в имени кэшируются на
+    STATIC_MAX_AGE с immutable, остальные проверяются по
+    Last-Modified при каждом обращении. Запросы к файлам, которых нет в
+    STATIC_ROOT, идут дальше как обычно.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (not settings.SERVE_STATIC or not settings.STATIC_ROOT
+                or request.method not in ('GET', 'HEAD')
+                or not request.path_info.startswith(settings.STATIC_URL)):
+            return self.get_response(request)
+        name = posixpath.normpath(
+            request.path_info[len(settings.STATIC_URL):]
+        ).lstrip('/')
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return self.get_response(request)
+        if not os.path.isfile(path):
+            return self.get_response(request)
+        return self.serve(request, name, path)
+
+    @staticmethod
+    def serve(request, name, path):
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        encoding = None
+        for coding, suffix in ENCODINGS:
+            if coding in accepted and os.path.isfile(path + suffix):
+                encoding, path = coding, path + suffix
+                break
+        stat = os.stat(path)
+        immutable = name in getattr(
+            staticfiles_storage, 'immutable_names', ())
+        if not was_modified_since(
+                request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            content_type = mimetypes.guess_type(name)[0]
+            response = FileResponse(
+                open(path, 'rb'),
+                content_type=content_type or 'application/octet-stream',
+            )
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if immutable:
+            patch_cache_control(
+                response, public=True, max_age=settings.STATIC_MAX_AGE,
+                immutable=True,
+            )
+        else:
+            patch_cache_control(response, public=True, max_age=0)
+        return response
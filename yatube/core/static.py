@@ -0,0 +1,101 @@
+"""Статика с хэшем содержимого в имени и заранее сжатыми копиями.
+
+collectstatic с CompressedManifestStorage кладет в STATIC_ROOT каждый
+файл дважды (css/site.css и css/site.1a2b3c4d5e6f.css),
+пишет манифест соответствия имен, а для текстовых файлов - еще и копии
+.gz и .br (brotli - если установлен пакет brotli). Тег {% static %}
+отдает имя с хэшем, поэтому такие файлы можно кэшировать навсегда.
+Без фронтенд-сервера их раздает StaticFilesMiddleware
+(core/middleware.py).
+"""
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.functional import cached_property
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# сжимаются только текстовые форматы: картинки уже сжаты
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.json', '.webmanifest',
+                '.txt', '.xml', '.html', '.map')
+# файлы меньше не сжимаются: выигрыш съедят заголовки
+MIN_SIZE: int = 256
+# копия хранится, только если она меньше оригинала хотя бы на 5%
+MIN_RATIO: float = 0.95
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def compress(path):
+    """Пишет рядом с файлом path копии .gz и .br (если они того
+    стоят). Возвращает расширения записанных копий."""
+    with open(path, 'rb') as file:
+        content = file.read()
+    variants = {}
+    if len(content) >= MIN_SIZE:
+        variants['.gz'] = gzip.compress(content, compresslevel=9, mtime=0)
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content)
+    written = []
+    for _encoding, suffix in ENCODINGS:
+        data = variants.get(suffix)
+        if data is not None and len(data) <= len(content) * MIN_RATIO:
+            with open(path + suffix, 'wb') as file:
+                file.write(data)
+            written.append(suffix)
+        elif os.path.exists(path + suffix):
+            # копия от прежней версии файла
+            os.remove(path + suffix)
+    return written
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым q, например
+    {'br', 'gzip'}."""
+    encodings = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        quality = 1.0
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                pass
+        coding = coding.strip().lower()
+        if coding and quality > 0:
+            encodings.add(coding)
+    return encodings
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, который после collectstatic сжимает
+    текстовые файлы в .gz и .br."""
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if settings.STATIC_MANIFEST_STRICT:
+                raise
+            # collectstatic не запускался (разработка, тесты): файл
+            # отдается по исходному имени
+            return name
+
+    @cached_property
+    def immutable_names(self):
+        """Имена с хэшем из манифеста: их содержимое не меняется."""
+        return frozenset(self.hashed_files.values())
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.lower().endswith(COMPRESSIBLE) and self.exists(name):
+                compress(self.path(name))
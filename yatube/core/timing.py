@@ -0,0 +1,104 @@
+"""Замеры времени запроса для заголовка Server-Timing.
+
+Замер включается только для выбранных запросов (ServerTimingMiddleware
+в core/middleware.py), а в остальных запросах обертки ниже сводятся к
+чтению одной contextvar, поэтому их можно держать включенными всегда.
+Считаются SQL-запросы (execute_wrapper соединений), рендер шаблонов
+(внешний Template.render), чтения кэша и создание миниатюр.
+"""
+import contextvars
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.template.base import Template
+
+current = contextvars.ContextVar('timing', default=None)
+
+
+class Timing:
+    """Время и число событий каждого вида за один запрос."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        # вложенные шаблоны (include) и get внутри get_many
+        # не считаются повторно
+        self.depth = defaultdict(int)
+
+    def add(self, name, seconds=0.0, count=1):
+        self.durations[name] += seconds
+        self.counts[name] += count
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.start
+
+
+@contextmanager
+def timed(name):
+    """Добавляет время блока к событию name текущего замера."""
+    timing = current.get()
+    if timing is None or timing.depth[name]:
+        yield
+        return
+    timing.depth[name] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.depth[name] -= 1
+        timing.add(name, time.perf_counter() - start)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """execute_wrapper соединения: время и число SQL-запросов."""
+    with timed('sql'):
+        return execute(sql, params, many, context)
+
+
+def _timed_render(render):
+    def wrapper(self, context):
+        with timed('template'):
+            return render(self, context)
+    return wrapper
+
+
+def _counted_get(get):
+    def wrapper(self, key, default=None, version=None):
+        timing = current.get()
+        if timing is None or timing.depth['cache']:
+            return get(self, key, default, version)
+        missing = object()
+        value = get(self, key, missing, version)
+        timing.add('cache_hit' if value is not missing else 'cache_miss')
+        return default if value is missing else value
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    def wrapper(self, keys, version=None):
+        timing = current.get()
+        if timing is None:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        timing.depth['cache'] += 1
+        try:
+            values = get_many(self, keys, version)
+        finally:
+            timing.depth['cache'] -= 1
+        timing.add('cache_hit', count=len(values))
+        timing.add('cache_miss', count=len(keys) - len(values))
+        return values
+    return wrapper
+
+
+def install():
+    """Оборачивает Template.render и чтения из кэша по умолчанию.
+    Вызывается один раз при старте (core/apps.py)."""
+    Template.render = _timed_render(Template.render)
+    backend = type(caches['default'])
+    backend.get = _counted_get(backend.get)
+    backend.get_many = _counted_get_many(backend.get_many)
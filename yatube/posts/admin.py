@@ -1,8 +1,101 @@
-from django.contrib import admin
-from .models import Post, Group, Comment, Follow
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.widgets import AutocompleteSelect
+from . import bulk, search
+from .models import Post, Group, Comment, Follow, Rendition
+from .paginators import EstimatedCountPaginator
 
 
-class PostAdmin(admin.ModelAdmin):
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """AutocompleteSelect, которому выбранный объект передается заранее
+    (preloaded): подпись берется из него, а не отдельным запросом на
+    каждую строку списка с list_editable."""
+    preloaded = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = {
+            str(v) for v in value
+            if str(v) not in self.choices.field.empty_values
+        }
+        obj = self.preloaded
+        if obj is None or selected != {str(obj.pk)}:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        options.append(self.create_option(
+            name, obj.pk, self.choices.field.label_from_instance(obj),
+            True, len(options),
+        ))
+        return [(None, options, 0)]
+
+
+class PreloadedChangeListForm(forms.ModelForm):
+    """Форма строки списка: выбранные объекты полей с автодополнением
+    берутся из строки, уже загруженной через list_select_related."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            widget = getattr(field.widget, 'widget', field.widget)
+            if isinstance(widget, PreloadedAutocompleteSelect):
+                widget.preloaded = getattr(self.instance, name, None)
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Общие настройки списков больших таблиц: примерное число записей
+    вместо COUNT(*) и массовое удаление порциями вместо
+    delete_selected, который загружает каждый объект."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('delete_in_chunks',)
+    # функция из posts/bulk.py: queryset -> число удаленных записей;
+    # без нее удаляется обычным queryset.delete()
+    bulk_delete = None
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs['widget'] = PreloadedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', PreloadedChangeListForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def delete_in_chunks(self, request, queryset):
+        if self.bulk_delete is None:
+            deleted, _ = queryset.delete()
+        else:
+            deleted = self.bulk_delete(queryset)
+        self.message_user(request, f'Удалено записей: {deleted}')
+    delete_in_chunks.short_description = 'Удалить выбранные'
+    delete_in_chunks.allowed_permissions = ('delete',)
+
+
+class PostActionForm(helpers.ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        widget=AutocompleteSelect(
+            Post._meta.get_field('group').remote_field, admin.site
+        ),
+    )
+    # форма общая для всех действий, поэтому группа не обязательна;
+    # перенос «без группы» нужно подтвердить явно
+    no_group = forms.BooleanField(required=False, label='Без группы')
+
+
+class PostAdmin(ScalableAdmin):
     list_display = (
         'pk',
         'text',
@@ -11,16 +104,84 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    action_form = PostActionForm
+    actions = ('move_to_group', 'delete_in_chunks')
+    bulk_delete = staticmethod(bulk.delete_posts)
+
+    def get_search_results(self, request, queryset, search_term):
+        # поиск по полнотекстовому индексу вместо LIKE '%...%'
+        if not search_term:
+            return queryset, False
+        return search.filter_posts(queryset, search_term), False
+
+    def move_to_group(self, request, queryset):
+        form = self.action_form(request.POST)
+        form.fields['action'].choices = self.get_action_choices(request)
+        if not form.is_valid():
+            self.message_user(request, 'Неизвестная группа', messages.ERROR)
+            return
+        group = form.cleaned_data['group']
+        if group is None and not form.cleaned_data['no_group']:
+            self.message_user(
+                request, 'Выберите группу или отметьте «Без группы»',
+                messages.ERROR,
+            )
+            return
+        moved = bulk.move_posts(queryset, group)
+        self.message_user(request, f'Перенесено постов: {moved}')
+    move_to_group.short_description = 'Перенести в группу'
+    move_to_group.allowed_permissions = ('change',)
 
 
 class GroupAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
+    search_fields = ('title',)
+
+
+class CommentAdmin(ScalableAdmin):
+    list_display = (
+        'pk',
+        'text',
+        'created',
+        'author',
+        'post',
+    )
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
+    bulk_delete = staticmethod(bulk.delete_comments)
+
+
+class FollowAdmin(ScalableAdmin):
+    list_display = (
+        'pk',
+        'user',
+        'author',
+    )
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    bulk_delete = staticmethod(bulk.delete_follows)
+
+
+class RenditionAdmin(admin.ModelAdmin):
+    list_display = (
+        'post',
+        'geometry',
+        'format',
+        'size',
+        'source_size',
+    )
+    list_select_related = ('post',)
+    list_filter = ('format', 'geometry')
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
-admin.site.register(Comment)
-admin.site.register(Follow)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(Rendition, RenditionAdmin)
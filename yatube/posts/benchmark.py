@@ -0,0 +1,234 @@
+"""Замеры скорости страниц через WSGI-приложение.
+
+Каждый сценарий - именованный адрес из posts/urls.py на данных, где он
+тяжелее всего (самый популярный пост, самый активный читатель и т.д.).
+Сценарий прогоняется несколькими параллельными клиентами (потоками) без
+сети, прямо через yatube.wsgi.application со всеми middleware. Итог -
+p50/p95/p99 задержки, запросы к БД на запрос и запросы в секунду;
+итог можно сохранить как базовый и сравнивать с ним следующие прогоны.
+"""
+import io
+import json
+import math
+import threading
+import time
+from contextlib import ExitStack
+from importlib import import_module
+from urllib.parse import unquote_to_bytes
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY
+from django.contrib.auth import SESSION_KEY
+from django.db import connections
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from .models import Group, Post, User, UserStats
+from .paginators import NUMBERED_PAGES
+
+# допустимый рост p95 и числа запросов относительно базового прогона
+THRESHOLD: float = 0.2
+# рост p95 меньше этого числа миллисекунд - шум, а не регрессия
+MIN_DELTA_MS: float = 2.0
+
+
+class Scenario:
+    def __init__(self, name, url, user=None, data=None):
+        self.name = name
+        self.url = url
+        self.user = user
+        self.data = data
+
+
+def scenarios():
+    """Сценарии на текущих данных; пропускаются те, для которых данных
+    нет (например, в базе нет групп)."""
+    post = Post.objects.order_by('-comments_count').first()
+    author = User.objects.order_by('-stats__posts_count').first()
+    reader = UserStats.objects.order_by('-following_count').first()
+    group = Group.objects.order_by('-pk').first()
+    items = [Scenario(
+        'index_deep',
+        reverse('space_posts:posts') + f'?page={NUMBERED_PAGES}',
+    )]
+    if group is not None:
+        items.append(Scenario('group', reverse(
+            'space_posts:group_list', kwargs={'slug': group.slug})))
+    if author is not None:
+        items.append(Scenario('profile', reverse(
+            'space_posts:profile', kwargs={'username': author.username})))
+    if post is not None:
+        items.append(Scenario('post_detail', post.get_absolute_url()))
+        items.append(Scenario(
+            'search',
+            reverse('space_posts:search') + '?' + urlencode(
+                {'q': post.text.split()[0] if post.text else ''}),
+        ))
+    if reader is not None:
+        items.append(Scenario(
+            'follow', reverse('space_posts:follow_index'), reader.user))
+        items.append(Scenario(
+            'create', reverse('space_posts:post_create'), reader.user,
+            {'text': 'Пост из бенчмарка'},
+        ))
+        if post is not None:
+            items.append(Scenario(
+                'comment',
+                reverse('space_posts:add_comment',
+                        kwargs={'post_id': post.pk}),
+                reader.user, {'text': 'Комментарий из бенчмарка'},
+            ))
+    return items
+
+
+def session_cookie(user):
+    """Кука сессии вошедшего user, как после входа."""
+    engine = import_module(settings.SESSION_ENGINE)
+    session = engine.SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+def environ(scenario, cookie, csrf):
+    """WSGI environ запроса сценария."""
+    path, _, query = scenario.url.partition('?')
+    env = {
+        # строка WSGI: байты UTF-8 адреса, прочитанные как latin-1
+        'PATH_INFO': unquote_to_bytes(path).decode('iso-8859-1'),
+        'QUERY_STRING': query,
+        'REQUEST_METHOD': 'GET',
+        'SERVER_NAME': 'testserver',
+    }
+    cookies = [cookie] if cookie else []
+    if scenario.data is not None:
+        body = urlencode(scenario.data).encode()
+        token, csrf_cookie = csrf
+        cookies.append(f'{settings.CSRF_COOKIE_NAME}={csrf_cookie}')
+        env.update({
+            'REQUEST_METHOD': 'POST',
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'HTTP_X_CSRFTOKEN': token,
+            'wsgi.input': io.BytesIO(body),
+        })
+    if cookies:
+        env['HTTP_COOKIE'] = '; '.join(cookies)
+    setup_testing_defaults(env)
+    return env
+
+
+def csrf_pair():
+    """(токен для заголовка, значение куки csrftoken)."""
+    request = HttpRequest()
+    token = get_token(request)
+    return token, request.META['CSRF_COOKIE']
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу; values отсортированы."""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(share * len(values)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def _worker(app, scenario, cookie, requests, latencies, queries, errors):
+    counter = {'queries': 0}
+
+    def count(execute, sql, params, many, context):
+        counter['queries'] += 1
+        return execute(sql, params, many, context)
+
+    csrf = csrf_pair()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(count))
+        for _ in range(requests):
+            statuses = []
+            start = time.perf_counter()
+            chunks = app(
+                environ(scenario, cookie, csrf),
+                lambda status, headers, exc_info=None: statuses.append(
+                    status),
+            )
+            for _chunk in chunks:
+                pass
+            if hasattr(chunks, 'close'):
+                chunks.close()
+            latencies.append(time.perf_counter() - start)
+            if int(statuses[0].split()[0]) >= 400:
+                errors.append(statuses[0])
+    queries.append(counter['queries'])
+
+
+def _thread(*args):
+    try:
+        _worker(*args)
+    finally:
+        # у каждого потока свои соединения
+        for connection in connections.all():
+            connection.close()
+
+
+def run(app, scenario, clients=4, requests=50):
+    """Прогоняет сценарий: clients потоков по requests запросов.
+    Возвращает словарь с метриками."""
+    cookie = session_cookie(scenario.user) if scenario.user else None
+    latencies, queries, errors = [], [], []
+    args = (app, scenario, cookie, requests, latencies, queries, errors)
+    start = time.perf_counter()
+    if clients == 1:
+        _worker(*args)
+    else:
+        threads = [
+            threading.Thread(target=_thread, args=args)
+            for _ in range(clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    total = len(latencies)
+    return {
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'queries': round(sum(queries) / max(total, 1), 2),
+        'rps': round(total / seconds, 1),
+        'errors': len(errors),
+    }
+
+
+def compare(results, baseline, threshold=THRESHOLD, min_delta=MIN_DELTA_MS):
+    """Сценарии, где p95 или число запросов к БД выросли больше чем на
+    threshold относительно baseline (p95 - еще и больше чем на min_delta
+    мс): [(сценарий, метрика, было, стало)]."""
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric, slack in (('p95_ms', min_delta), ('queries', 0)):
+            before, after = base[metric], metrics[metric]
+            if after > before * (1 + threshold) and after - before > slack:
+                regressions.append((name, metric, before, after))
+    return regressions
+
+
+def save(results, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2,
+                  sort_keys=True)
+
+
+def read(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
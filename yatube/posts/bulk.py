@@ -0,0 +1,104 @@
+"""Массовые операции над постами, комментариями и подписками.
+
+Каждая порция из CHUNK_SIZE строк обрабатывается одним UPDATE/DELETE
+в своей транзакции, без загрузки объектов и без сигналов на каждую
+строку; то, что обычно делают сигналы (счетчики, ленты, кэш), здесь
+делается одним запросом на порцию.
+"""
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import counters, feeds, timeline
+from .models import Comment, Follow, Post, Rendition, TimelineEntry
+
+CHUNK_SIZE: int = 1000
+
+
+def chunks(queryset, size=CHUNK_SIZE):
+    """Первичные ключи queryset порциями по size, по возрастанию:
+    каждая порция - отдельный запрос с pk > последнего ключа."""
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        chunk = list(page[:size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+def _totals(queryset, field):
+    return queryset.order_by().values_list(field).annotate(total=Count('pk'))
+
+
+def _raw_delete(queryset):
+    # DELETE одним запросом, без сбора связанных объектов и сигналов
+    queryset._raw_delete(queryset.db)
+
+
+def move_posts(queryset, group):
+    """Переносит посты в группу group (None - убрать из группы)."""
+    moved = 0
+    for chunk in chunks(queryset):
+        with transaction.atomic():
+            # updated меняет ключи карточек постов
+            moved += Post.objects.filter(pk__in=chunk).update(
+                group=group, updated=timezone.now()
+            )
+    feeds.bump_all_feeds()
+    return moved
+
+
+def delete_posts(queryset):
+    deleted = 0
+    for chunk in chunks(queryset):
+        with transaction.atomic():
+            posts = Post.objects.filter(pk__in=chunk)
+            for author_id, total in _totals(posts, 'author'):
+                counters.change_user(author_id, 'posts_count', -total)
+            for model in (Comment, TimelineEntry, Rendition):
+                _raw_delete(model.objects.filter(post__in=chunk))
+            _raw_delete(posts)
+            deleted += len(chunk)
+    feeds.bump_all_feeds()
+    return deleted
+
+
+def delete_comments(queryset):
+    deleted = 0
+    for chunk in chunks(queryset):
+        with transaction.atomic():
+            comments = Comment.objects.filter(pk__in=chunk)
+            for post_id, total in _totals(comments, 'post'):
+                counters.change(Post, post_id, 'comments_count', -total)
+            _raw_delete(comments)
+            deleted += len(chunk)
+    feeds.bump_all_feeds()
+    return deleted
+
+
+def delete_follows(queryset):
+    deleted = 0
+    for chunk in chunks(queryset):
+        with transaction.atomic():
+            follows = Follow.objects.filter(pk__in=chunk)
+            for author_id, total in _totals(follows, 'author'):
+                counters.change_user(author_id, 'followers_count', -total)
+            for user_id, total in _totals(follows, 'user'):
+                counters.change_user(user_id, 'following_count', -total)
+            readers = {}
+            for user_id, author_id in follows.values_list('user', 'author'):
+                readers.setdefault(author_id, []).append(user_id)
+            for author_id, user_ids in readers.items():
+                _raw_delete(TimelineEntry.objects.filter(
+                    post__author=author_id, user__in=user_ids
+                ))
+            _raw_delete(follows)
+            for author_id in readers:
+                # автор мог опуститься ниже порога рассылки
+                timeline.follower_left(author_id)
+            deleted += len(chunk)
+    feeds.bump_all_feeds()
+    return deleted
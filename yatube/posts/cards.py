@@ -0,0 +1,44 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .thumbnails import attach_thumbnails
+
+CARD_TEMPLATE = 'includes/post_card.html'
+# варианты карточки: лента (index, follow), группа, профиль
+VARIANTS = ('feed', 'group', 'profile')
+CARD_TIMEOUT: int = 60 * 60 * 24
+
+
+def card_key(post, variant):
+    """Ключ карточки меняется при каждом сохранении поста (updated),
+    поэтому устаревшая карточка никогда не отдается."""
+    return make_template_fragment_key(
+        'post_card', [variant, post.pk, post.updated.timestamp()]
+    )
+
+
+def attach_cards(posts, variant):
+    """Кладет в post.card готовый HTML карточки: все карточки страницы
+    читаются из кэша одним get_many, недостающие рендерятся и
+    сохраняются одним set_many."""
+    keys = {post.pk: card_key(post, variant) for post in posts}
+    cached = cache.get_many(keys.values())
+    attach_thumbnails(
+        [post for post in posts if keys[post.pk] not in cached]
+    )
+    missing = {}
+    for post in posts:
+        post.card = mark_safe(cached.get(keys[post.pk], ''))
+        if not post.card:
+            post.card = render_to_string(
+                CARD_TEMPLATE, {'post': post, 'variant': variant}
+            )
+            missing[keys[post.pk]] = post.card
+    if missing:
+        cache.set_many(missing, CARD_TIMEOUT)
+
+
+def forget_cards(post):
+    cache.delete_many([card_key(post, variant) for variant in VARIANTS])
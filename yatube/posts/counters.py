@@ -0,0 +1,82 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, User, UserStats
+
+BATCH_SIZE: int = 500
+
+
+def change(model, pk, field, delta):
+    """Атомарно сдвигает счетчик field строки pk на delta. Счетчик не
+    уходит ниже нуля, даже если разошелся с таблицей (например, после
+    bulk_create или загрузки без сигналов)."""
+    value = F(field) + delta
+    if delta < 0:
+        value = Greatest(value, 0)
+    return model.objects.filter(pk=pk).update(**{field: value})
+
+
+def change_user(user_id, field, delta):
+    """То же для UserStats; строка создается, если ее еще нет
+    (например, пользователь загружен фикстурой)."""
+    if not change(UserStats, user_id, field, delta) and delta > 0:
+        UserStats.objects.get_or_create(
+            user_id=user_id, defaults={field: delta}
+        )
+
+
+def posts_count(user):
+    """Число постов user; 0, если строки UserStats еще нет."""
+    stats = getattr(user, 'stats', None)
+    return stats.posts_count if stats is not None else 0
+
+
+def _count(model, field):
+    """Подзапрос: число строк model, у которых field = OuterRef('pk')."""
+    queryset = (
+        model.objects
+        .filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(queryset), 0)
+
+
+def _reconcile(model, counters, using='default'):
+    """Переписывает счетчики тех строк model, где они разошлись с
+    реальными COUNT(*); counters - {поле: подзапрос}. Возвращает число
+    исправленных строк."""
+    real = {f'real_{field}': value for field, value in counters.items()}
+    drifted = list(
+        model.objects.using(using).annotate(**real).exclude(**{
+            field: F(f'real_{field}') for field in counters
+        }).values_list('pk', flat=True)
+    )
+    for start in range(0, len(drifted), BATCH_SIZE):
+        model.objects.using(using).filter(
+            pk__in=drifted[start:start + BATCH_SIZE]
+        ).update(**counters)
+    return len(drifted)
+
+
+def recount(using='default'):
+    """Сверяет все счетчики с таблицами. Возвращает словарь
+    {модель: число исправленных строк}."""
+    missing = User.objects.using(using).filter(
+        stats__isnull=True
+    ).values_list('pk', flat=True)
+    UserStats.objects.using(using).bulk_create(
+        [UserStats(user_id=pk) for pk in missing], batch_size=BATCH_SIZE
+    )
+    return {
+        'UserStats': _reconcile(UserStats, {
+            'posts_count': _count(Post, 'author'),
+            'followers_count': _count(Follow, 'author'),
+            'following_count': _count(Follow, 'user'),
+        }, using),
+        'Post': _reconcile(Post, {
+            'comments_count': _count(Comment, 'post'),
+        }, using),
+    }
@@ -0,0 +1,181 @@
+"""Синтетические данные в масштабе продакшена для локальных замеров.
+
+Генератор выдает объекты в формате сериализатора python, которые
+записывает загрузчик (posts/loader.py) пачками INSERT без сигналов.
+Распределения близки к настоящим: число подписчиков и активность
+авторов подчиняются степенному закону (Парето), посты выходят сериями
+в течение нескольких минут, комментарии достаются в основном
+популярным постам, часть постов с картинками. При одном и том же seed
+и параметрах получаются одни и те же данные.
+"""
+import io
+import random
+from array import array
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from . import images
+from .models import Comment, Follow, Group, Post, User
+
+# конец интервала дат по умолчанию: фиксирован ради повторяемости
+UNTIL = datetime(2024, 1, 1, tzinfo=timezone.utc)
+IMAGE_POOL: int = 20
+IMAGE_SIZE = (960, 640)
+# показатель Парето: чем меньше, тем сильнее перекос
+PARETO_ALPHA: float = 1.2
+# доля постов в группах
+GROUP_SHARE: float = 0.7
+WORDS = (
+    'жизнь мир война дом город лес река море небо солнце ночь день '
+    'утро вечер книга письмо дорога друг время год любовь память '
+    'слово дело голос свет тень окно сад поле ветер снег дождь'
+).split()
+FIRST_NAMES = ('Лев', 'Анна', 'Федор', 'Мария', 'Иван', 'Ольга', 'Петр')
+LAST_NAMES = ('Толстой', 'Ахматова', 'Достоевский', 'Цветаева', 'Бунин')
+
+
+def _next_pk(model):
+    return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def _text(rnd, low, high):
+    return ' '.join(rnd.choices(WORDS, k=rnd.randint(low, high))).capitalize()
+
+
+def _cum_weights(rnd, count):
+    """Накопленные веса Парето для random.choices."""
+    total = 0.0
+    weights = array('d')
+    for _ in range(count):
+        total += rnd.paretovariate(PARETO_ALPHA)
+        weights.append(total)
+    return weights
+
+
+def _skewed(rnd, count, power=4):
+    """Номер от 0 до count - 1 с сильным перекосом к немногим
+    «популярным», перемешанным по всему диапазону."""
+    index = int(count * rnd.random() ** power)
+    # умножение на простое число, большее count, - перестановка
+    return index * 2654435761 % count
+
+
+def image_pool(rnd, size=IMAGE_POOL):
+    """Сохраняет несколько картинок, общих для всех постов с
+    картинками, и возвращает поля поста для каждой."""
+    pool = []
+    for number in range(size):
+        image = Image.new('RGB', IMAGE_SIZE, tuple(
+            rnd.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(8):
+            x, y = rnd.randrange(IMAGE_SIZE[0]), rnd.randrange(IMAGE_SIZE[1])
+            draw.ellipse(
+                (x, y, x + rnd.randint(40, 300), y + rnd.randint(40, 300)),
+                fill=tuple(rnd.randrange(256) for _ in range(3)),
+            )
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=80)
+        name = f'posts/synthetic/{number}.jpg'
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        name = default_storage.save(name, ContentFile(buffer.getvalue()))
+        with default_storage.open(name) as file:
+            pool.append({'image': name, **images.describe(file)})
+    return pool
+
+
+def generate(users=1000, groups=20, posts=10000, comments=20000,
+             follows=10000, image_share=0.1, days=365, seed=0,
+             until=UNTIL):
+    """Объекты users, groups, follows, posts и comments по порядку."""
+    rnd = random.Random(seed)
+    since = until - timedelta(days=days)
+    span = (until - since).total_seconds()
+    user_pk, group_pk = _next_pk(User), _next_pk(Group)
+    post_pk, comment_pk = _next_pk(Post), _next_pk(Comment)
+    follow_pk = _next_pk(Follow)
+    user_ids = range(user_pk, user_pk + users)
+    password = make_password('password')
+    for pk in user_ids:
+        yield {'model': 'auth.user', 'pk': pk, 'fields': {
+            'username': f'user{pk}',
+            'password': password,
+            'first_name': rnd.choice(FIRST_NAMES),
+            'last_name': rnd.choice(LAST_NAMES),
+            'email': f'user{pk}@example.com',
+            'is_active': True,
+            'date_joined': since,
+        }}
+    group_ids = range(group_pk, group_pk + groups)
+    for pk in group_ids:
+        yield {'model': 'posts.group', 'pk': pk, 'fields': {
+            'title': f'Группа {pk}',
+            'slug': f'group-{pk}',
+            'description': _text(rnd, 5, 20),
+        }}
+
+    # подписки: читатель - любой, автор - по степенному закону
+    popularity = _cum_weights(rnd, users)
+    pairs = set()
+    attempts = 0
+    while len(pairs) < follows and attempts < follows * 3 and users > 1:
+        attempts += 1
+        user = rnd.choice(user_ids)
+        author = rnd.choices(user_ids, cum_weights=popularity)[0]
+        if user == author or (user, author) in pairs:
+            continue
+        pairs.add((user, author))
+        yield {'model': 'posts.follow', 'pk': follow_pk, 'fields': {
+            'user': user, 'author': author,
+        }}
+        follow_pk += 1
+    del pairs
+
+    # посты сериями: автор пишет несколько постов подряд с паузами
+    # в минуты, серии равномерно раскиданы по интервалу
+    activity = _cum_weights(rnd, users)
+    group_weights = _cum_weights(rnd, groups) if groups else None
+    pool = image_pool(rnd) if posts and image_share else []
+    pub_dates = array('d')
+    while len(pub_dates) < posts:
+        author = rnd.choices(user_ids, cum_weights=activity)[0]
+        moment = since.timestamp() + rnd.random() * span
+        for _ in range(min(1 + int(rnd.expovariate(0.5)),
+                           posts - len(pub_dates))):
+            moment += rnd.expovariate(1 / 600)
+            pub_date = datetime.fromtimestamp(moment, timezone.utc)
+            group = None
+            if group_weights and rnd.random() < GROUP_SHARE:
+                group = rnd.choices(group_ids, cum_weights=group_weights)[0]
+            fields = {
+                'text': _text(rnd, 5, 80),
+                'pub_date': pub_date,
+                'updated': pub_date,
+                'author': author,
+                'group': group,
+                'image': '',
+            }
+            if pool and rnd.random() < image_share:
+                fields.update(rnd.choice(pool))
+            yield {'model': 'posts.post', 'pk': post_pk + len(pub_dates),
+                   'fields': fields}
+            pub_dates.append(moment)
+
+    # комментарии: в основном к немногим популярным постам, вскоре
+    # после публикации
+    for pk in range(comment_pk, comment_pk + (comments if posts else 0)):
+        index = _skewed(rnd, posts)
+        created = pub_dates[index] + rnd.expovariate(1 / 86400)
+        yield {'model': 'posts.comment', 'pk': pk, 'fields': {
+            'post': post_pk + index,
+            'author': rnd.choice(user_ids),
+            'text': _text(rnd, 3, 30),
+            'created': datetime.fromtimestamp(created, timezone.utc),
+        }}
@@ -0,0 +1,90 @@
+"""ETag страниц для условных GET (django.views.decorators.http.condition).
+
+ETag считается до основного запроса view из версий лент в кэше
+(сдвигаются сигналами при любой правке, см. posts/feeds.py) и одного
+запроса к БД: последнее updated и число постов ленты, счетчики, время
+последнего комментария. Версии в кэше могут пропасть или, с кэшем в
+памяти процесса, не дойти до других процессов, поэтому данные из БД
+в ETag входят всегда. В ETag входят пользователь и адрес
+страницы с параметрами, так что гостю и вошедшему пользователю, разным
+страницам ленты никогда не достается один и тот же ETag.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+
+from . import feeds
+from .models import Group, Post, UserStats
+from .timeline import timeline_posts
+
+
+def _etag(request, *parts):
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    raw = '|'.join(
+        str(part) for part in (user, request.get_full_path(), *parts)
+    )
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _changes(queryset):
+    """Метка изменений постов queryset в самой БД: последнее updated и
+    число постов. Версии в кэше процесса (locmem) видит только этот
+    процесс, а правка старого поста сдвигает updated, удаление - число."""
+    row = queryset.aggregate(updated=Max('updated'), count=Count('pk'))
+    return row['updated'], row['count']
+
+
+def index(request):
+    return _etag(
+        request, feeds.feed_version(feeds.INDEX),
+        *_changes(Post.objects.all()),
+    )
+
+
+def group(request, slug):
+    row = Group.objects.filter(slug=slug).annotate(
+        updated=Max('posts__updated'), count=Count('posts'),
+    ).values_list('pk', 'updated', 'count').first()
+    if row is None:
+        return None
+    return _etag(request, feeds.feed_version(feeds.group_feed(row[0])), *row)
+
+
+def profile(request, username):
+    row = UserStats.objects.filter(user__username=username).annotate(
+        updated=Max('user__posts__updated'), count=Count('user__posts'),
+    ).values_list(
+        'user', 'followers_count', 'following_count', 'updated', 'count',
+    ).first()
+    if row is None:
+        return None
+    return _etag(
+        request, feeds.feed_version(feeds.profile_feed(row[0])), *row
+    )
+
+
+def follow(request):
+    if not request.user.is_authenticated:
+        return None
+    # последняя подписка: замена одного автора другим не меняет
+    # following_count, но всегда добавляет новую строку Follow
+    row = UserStats.objects.filter(user=request.user).annotate(
+        last_follow=Max('user__follower__pk'),
+    ).values_list('following_count', 'last_follow').first()
+    # любая правка поста сдвигает версию общей ленты
+    return _etag(
+        request,
+        feeds.feed_version(feeds.follow_feed(request.user.pk), feeds.INDEX),
+        row, *_changes(timeline_posts(request.user)),
+    )
+
+
+def post(request, post_id):
+    row = Post.objects.filter(pk=post_id).annotate(
+        last_comment=Max('comments__created'), comments=Count('comments'),
+    ).values_list(
+        'updated', 'comments', 'author__stats__posts_count', 'last_comment',
+    ).first()
+    if row is None:
+        return None
+    return _etag(request, feeds.feed_version(feeds.ALL_FEEDS), *row)
@@ -0,0 +1,110 @@
+"""Потоковая выгрузка постов, комментариев и подписок в JSON Lines
+или CSV. Строки читаются из БД порциями (QuerySet.iterator), а наружу
+отдаются кусками по CHUNK_ROWS строк, при необходимости сразу сжатыми
+gzip, поэтому память не зависит от размера таблиц."""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Comment, Follow, Post
+
+CHUNK_ROWS: int = 1000
+# (модель, поле даты для since или None, выгружаемые колонки)
+TABLES = {
+    'posts': (
+        Post, 'pub_date',
+        ('id', 'pub_date', 'author', 'group', 'text', 'image'),
+    ),
+    'comments': (
+        Comment, 'created',
+        ('id', 'created', 'post', 'author', 'text'),
+    ),
+    'follows': (Follow, None, ('id', 'user', 'author')),
+}
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def parse_since(value):
+    """Дата (с начала суток) или дата со временем из строки;
+    ValueError, если не удалось разобрать. Время без часового пояса
+    считается временем TIME_ZONE."""
+    since = parse_datetime(value)
+    if since is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Неверная дата: {value}')
+        since = datetime.combine(day, time())
+    if settings.USE_TZ and timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def rows(table, since=None):
+    """Строки таблицы по возрастанию id; since отбирает записи не
+    старше этой даты (у подписок даты нет - они выгружаются целиком)."""
+    model, date_field, columns = TABLES[table]
+    queryset = model.objects.order_by('pk')
+    if since is not None and date_field is not None:
+        queryset = queryset.filter(**{f'{date_field}__gte': since})
+    return columns, queryset.values_list(*columns).iterator(
+        chunk_size=CHUNK_ROWS
+    )
+
+
+def _jsonl(columns, values):
+    for row in values:
+        yield json.dumps(
+            dict(zip(columns, row)), cls=DjangoJSONEncoder,
+            ensure_ascii=False,
+        ) + '\n'
+
+
+def _csv(columns, values):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in values:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _chunks(lines):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= CHUNK_ROWS:
+            yield ''.join(chunk).encode()
+            chunk = []
+    if chunk:
+        yield ''.join(chunk).encode()
+
+
+def _gzip(chunks):
+    # wbits=31 - формат gzip, а не голый zlib
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(table, fmt='jsonl', since=None, compress=False):
+    """Байтовые куски выгрузки таблицы table в формате fmt."""
+    columns, values = rows(table, since)
+    lines = _csv(columns, values) if fmt == 'csv' else _jsonl(columns, values)
+    chunks = _chunks(lines)
+    return _gzip(chunks) if compress else chunks
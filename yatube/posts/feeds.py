@@ -0,0 +1,94 @@
+from django.core.cache import cache
+
+from core.cache import bump_version
+
+# общая версия всех лент: сдвигается при правках, затрагивающих
+# посты во многих лентах сразу (переименование группы или автора)
+ALL_FEEDS = 'feed:all'
+INDEX = 'feed:index'
+
+
+def group_feed(group_id):
+    return f'feed:group:{group_id}'
+
+
+def profile_feed(author_id):
+    return f'feed:profile:{author_id}'
+
+
+def follow_feed(user_id):
+    """Лента подписок пользователя: меняется при подписке и отписке,
+    даже если общая лента и число подписок остались прежними. Новые и
+    измененные посты ее подписок сдвигают версию INDEX, поэтому ключи
+    ее кэша строятся с feed_version(follow_feed(id), INDEX)."""
+    return f'feed:follow:{user_id}'
+
+
+def profile_page(username):
+    """Версия страницы профиля сверх ленты: число подписчиков и
+    кнопка подписки меняются без правки постов."""
+    return f'page:profile:{username}'
+
+
+def post_page(post_id):
+    """Версия страницы поста сверх ленты: комментарии."""
+    return f'page:post:{post_id}'
+
+
+def feed_version(name, *depends):
+    """Версия ленты name с учетом общей версии и лент depends, из
+    которых она собрана, - часть ключа кэша ее страниц."""
+    return versions(name, *depends, ALL_FEEDS)
+
+
+def versions(*names):
+    """Версии нескольких наборов ключей одной строкой (одно чтение
+    из кэша)."""
+    keys = [f'version:{name}' for name in names]
+    values = cache.get_many(keys)
+    missing = {key: 1 for key in keys if key not in values}
+    if missing:
+        cache.set_many(missing, None)
+        values.update(missing)
+    return '.'.join(str(values[key]) for key in keys)
+
+
+def bump_post_feeds(group_id, author_id):
+    """Сбрасывает кэш лент, в которые входит пост."""
+    bump_version(INDEX)
+    bump_version(profile_feed(author_id))
+    if group_id is not None:
+        bump_version(group_feed(group_id))
+
+
+def bump_author_feeds(author_id, group_ids):
+    """Сбрасывает кэш лент со всеми постами автора (смена имени)."""
+    bump_version(INDEX)
+    bump_version(profile_feed(author_id))
+    for group_id in group_ids:
+        bump_version(group_feed(group_id))
+
+
+def bump_all_feeds():
+    bump_version(ALL_FEEDS)
+
+
+def bump_post_page(post_id):
+    bump_version(post_page(post_id))
+
+
+def bump_follow_feed(user_id):
+    bump_version(follow_feed(user_id))
+
+
+def bump_follow_feeds(user_ids):
+    """То же для лент многих пользователей: одно чтение и одна запись
+    в кэш вместо incr на каждого."""
+    keys = [f'version:{follow_feed(user_id)}' for user_id in user_ids]
+    values = cache.get_many(keys)
+    cache.set_many({key: values.get(key, 1) + 1 for key in keys}, None)
+
+
+def bump_profile_pages(*usernames):
+    for username in usernames:
+        bump_version(profile_page(username))
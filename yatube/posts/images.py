@@ -0,0 +1,35 @@
+import base64
+import io
+
+from PIL import Image, ImageFilter
+
+# сторона превью-заглушки, пикселей: ~300-600 байт в base64
+PLACEHOLDER_SIZE: int = 16
+PALETTE_COLORS: int = 5
+
+
+def describe(file):
+    """Размеры, преобладающий цвет и размытое превью картинки в виде
+    data URI - все, что нужно ленте, чтобы не открывать файл."""
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        # JPEG декодируется сразу в уменьшенном виде
+        image.draft('RGB', (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+        small = image.convert('RGB')
+    file.seek(0)
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    palette = small.quantize(colors=PALETTE_COLORS)
+    _, index = max(palette.getcolors())
+    red, green, blue = palette.getpalette()[index * 3:index * 3 + 3]
+    buffer = io.BytesIO()
+    small.filter(ImageFilter.GaussianBlur(1)).save(
+        buffer, 'JPEG', quality=40
+    )
+    placeholder = base64.b64encode(buffer.getvalue()).decode()
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_color': f'#{red:02x}{green:02x}{blue:02x}',
+        'image_placeholder': f'data:image/jpeg;base64,{placeholder}',
+    }
@@ -0,0 +1,219 @@
+"""Потоковая загрузка фикстур Django (JSON-массив) и JSON Lines
+(по объекту фикстуры в строке) пачками многострочных INSERT.
+
+Объекты группируются по моделям и записываются пачками по batch_size
+в отдельных транзакциях; проверка внешних ключей отключена на время
+загрузки и выполняется один раз в конце, поэтому порядок моделей в
+файле не важен. Сигналы не отправляются - счетчики и кэши лент
+пересчитываются после загрузки.
+"""
+import gzip
+import itertools
+import json
+import re
+import time
+
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import counters, feeds, timeline
+from .models import Follow, Post, TimelineEntry
+
+BATCH_SIZE: int = 1000
+READ_SIZE: int = 1 << 16
+# служебные таблицы, которые незачем переносить между окружениями
+NOISE = ('thumbnail.kvstore', 'admin.logentry')
+SPACE = re.compile(r'[\s,]*')
+
+
+def _open(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def iter_array(file, read_size=READ_SIZE):
+    """Элементы JSON-массива по одному, без чтения файла целиком."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(read_size).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('Ожидался JSON-массив')
+    pos = 1
+    eof = False
+    while True:
+        pos = SPACE.match(buffer, pos).end()
+        if buffer.startswith(']', pos):
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            if eof:
+                raise
+            chunk = file.read(read_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield obj
+        pos = end
+
+
+def iter_lines(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_objects(path):
+    """Объекты фикстуры из файла .json, .jsonl (можно .gz)."""
+    with _open(path) as file:
+        name = path[:-3] if path.endswith('.gz') else path
+        if name.endswith(('.jsonl', '.ndjson')):
+            yield from iter_lines(file)
+        else:
+            yield from iter_array(file)
+
+
+def _excluded(label, exclude):
+    app_label = label.split('.')[0]
+    return label in exclude or app_label in exclude
+
+
+def _fill_dates(obj):
+    """auto_now/auto_now_add-поля, которых нет в старой фикстуре.
+    Запись идет без pre_save, иначе auto_now_add затер бы даты из
+    фикстуры."""
+    for field in obj._meta.concrete_fields:
+        auto = getattr(field, 'auto_now', False) or getattr(
+            field, 'auto_now_add', False)
+        if auto and getattr(obj, field.attname) is None:
+            setattr(obj, field.attname, timezone.now())
+
+
+class Loader:
+    def __init__(self, using='default', batch_size=BATCH_SIZE, exclude=()):
+        self.using = using
+        self.batch_size = batch_size
+        self.exclude = set(exclude)
+        self.pending = {}
+        self.deferred = []
+        self.loaded = {}
+
+    def _insert(self, model, objs):
+        # тот же многострочный INSERT, что в bulk_create, но raw=True:
+        # значения полей пишутся как есть, как в loaddata
+        connection = connections[self.using]
+        fields = model._meta.concrete_fields
+        size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+        manager = model._base_manager.using(self.using)
+        for start in range(0, len(objs), size):
+            manager._insert(
+                objs[start:start + size], fields=fields,
+                using=self.using, raw=True,
+            )
+
+    def _m2m_rows(self, model, deserialized):
+        rows = {}
+        for item in deserialized:
+            for name, values in item.m2m_data.items():
+                field = model._meta.get_field(name)
+                through = field.remote_field.through
+                source = f'{field.m2m_field_name()}_id'
+                target = f'{field.m2m_reverse_field_name()}_id'
+                rows.setdefault(through, []).extend(
+                    through(**{source: item.object.pk, target: value})
+                    for value in values
+                )
+        return rows
+
+    def flush(self, model):
+        deserialized = self.pending.pop(model, [])
+        if not deserialized:
+            return
+        with transaction.atomic(using=self.using):
+            self._insert(model, [item.object for item in deserialized])
+            for through, rows in self._m2m_rows(model, deserialized).items():
+                self._insert(through, rows)
+        self.loaded[model] = self.loaded.get(model, 0) + len(deserialized)
+
+    def _deserialize(self, data):
+        return next(serializers.deserialize(
+            'python', [data], using=self.using, ignorenonexistent=True
+        ))
+
+    def add(self, data, retry=True):
+        if _excluded(data['model'], self.exclude):
+            return
+        try:
+            item = self._deserialize(data)
+        except serializers.base.DeserializationError:
+            # natural key ссылается на объект, который еще в очереди
+            # или дальше в файле
+            if not retry:
+                raise
+            self.flush_all()
+            try:
+                item = self._deserialize(data)
+            except serializers.base.DeserializationError:
+                self.deferred.append(data)
+                return
+        model = type(item.object)
+        _fill_dates(item.object)
+        batch = self.pending.setdefault(model, [])
+        batch.append(item)
+        if len(batch) >= self.batch_size:
+            self.flush(model)
+
+    def flush_all(self):
+        for model in list(self.pending):
+            self.flush(model)
+
+    def load(self, objects):
+        """Загружает объекты; возвращает {модель: число строк}."""
+        connection = connections[self.using]
+        with connection.constraint_checks_disabled():
+            for data in objects:
+                self.add(data)
+            self.flush_all()
+            deferred, self.deferred = self.deferred, []
+            for data in deferred:
+                self.add(data, retry=False)
+            self.flush_all()
+        tables = [model._meta.db_table for model in self.loaded]
+        connection.check_constraints(table_names=tables)
+        sequence_sql = connection.ops.sequence_reset_sql(
+            no_style(), list(self.loaded)
+        )
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+        return self.loaded
+
+
+def load_objects(objects, using='default', batch_size=BATCH_SIZE,
+                 exclude=()):
+    """Загружает объекты в формате сериализатора python и приводит в
+    порядок то, что обычно делают сигналы. Возвращает
+    ({модель: число строк}, секунды)."""
+    start = time.monotonic()
+    loader = Loader(using, batch_size, exclude)
+    loader.load(objects)
+    counters.recount(using)
+    timeline.reset_pulled(using)
+    if ((Post in loader.loaded or Follow in loader.loaded)
+            and TimelineEntry not in loader.loaded):
+        # ленты подписок заполняются при сохранении постов и подписок
+        timeline.rebuild(using)
+    feeds.bump_all_feeds()
+    return loader.loaded, time.monotonic() - start
+
+
+def load(paths, using='default', batch_size=BATCH_SIZE, exclude=()):
+    """То же для файлов фикстур и JSON Lines."""
+    objects = itertools.chain.from_iterable(
+        iter_objects(path) for path in paths
+    )
+    return load_objects(objects, using, batch_size, exclude)
@@ -0,0 +1,110 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.db import apply_pragmas
+from posts.models import Comment, Post
+from posts.views import N_EXEMPLE
+
+# как было: журнал DELETE и ожидание блокировки модуля sqlite3 (5 с)
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': 5000,
+}
+READ_SQL = 'SELECT * FROM {} ORDER BY pub_date DESC, id DESC LIMIT {}'.format(
+    Post._meta.db_table, N_EXEMPLE)
+WRITE_SQL = (
+    'INSERT INTO {} (post_id, author_id, text, created) '
+    'VALUES (?, ?, ?, ?)'.format(Comment._meta.db_table)
+)
+
+
+def worker(path, pragmas, deadline, write_share, posts, result):
+    db = sqlite3.connect(path, timeout=5, isolation_level=None)
+    # режим журнала хранится в самом файле и уже задан при копировании
+    apply_pragmas(db.cursor(), {
+        name: value for name, value in pragmas.items()
+        if name != 'journal_mode'
+    })
+    reads = writes = locked = 0
+    rnd = random.Random()
+    while time.perf_counter() < deadline:
+        try:
+            if rnd.random() < write_share:
+                post_id, author_id = rnd.choice(posts)
+                db.execute(WRITE_SQL, (
+                    post_id, author_id, 'Комментарий из бенчмарка',
+                    timezone.now().isoformat(' '),
+                ))
+                writes += 1
+            else:
+                db.execute(READ_SQL).fetchall()
+                reads += 1
+        except sqlite3.OperationalError:
+            # database is locked
+            locked += 1
+    db.close()
+    result.append((reads, writes, locked))
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite при смешанных '
+            'чтениях и записях с настройками по умолчанию и с '
+            'SQLITE_PRAGMAS (на копии базы)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument(
+            '--write-share', type=float, default=0.2,
+            help='доля записей среди операций',
+        )
+
+    def run(self, path, pragmas, options):
+        posts = list(Post.objects.values_list('pk', 'author_id')[:1000])
+        deadline = time.perf_counter() + options['seconds']
+        result = []
+        threads = [
+            threading.Thread(target=worker, args=(
+                path, pragmas, deadline, options['write_share'], posts,
+                result,
+            ))
+            for _ in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        reads, writes, locked = (sum(column) for column in zip(*result))
+        seconds = options['seconds']
+        self.stdout.write(
+            f'чтений/с: {reads / seconds:.0f}, '
+            f'записей/с: {writes / seconds:.0f}, '
+            f'"database is locked": {locked}'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Бенчмарк только для SQLite')
+        if not Post.objects.exists():
+            raise CommandError('В базе нет постов')
+        connection.ensure_connection()
+        for title, pragmas in (('По умолчанию', DEFAULT_PRAGMAS),
+                               ('SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS)):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                copy = sqlite3.connect(path)
+                connection.connection.backup(copy)
+                apply_pragmas(copy.cursor(), pragmas)
+                copy.close()
+                self.stdout.write(self.style.MIGRATE_HEADING(title))
+                self.run(path, pragmas, options)
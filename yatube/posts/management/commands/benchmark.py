@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from posts import benchmark
+from yatube.wsgi import application
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку (p50/p95/p99), запросы к БД и запросы в '
+            'секунду страниц из posts/urls.py через WSGI-приложение; '
+            'сценарии create и comment пишут в базу')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=4)
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='запросов на клиента в каждом сценарии',
+        )
+        parser.add_argument(
+            '--only', action='append', default=[],
+            help='имя сценария, можно несколько раз',
+        )
+        parser.add_argument(
+            '--baseline', help='JSON базового прогона для сравнения',
+        )
+        parser.add_argument(
+            '--save-baseline', help='сохранить итог как базовый в JSON',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=benchmark.THRESHOLD,
+            help='допустимый рост p95 и числа запросов к БД (0.2 - 20%%)',
+        )
+        parser.add_argument(
+            '--min-delta', type=float, default=benchmark.MIN_DELTA_MS,
+            help='рост p95 меньше стольких мс не считается регрессией',
+        )
+        parser.add_argument(
+            '--no-page-cache', action='store_true',
+            help='без кэша целых страниц: замеряются сами views',
+        )
+
+    def handle(self, *args, **options):
+        if options['no_page_cache']:
+            with override_settings(PAGE_CACHE_TIMEOUT=0):
+                return self.measure(options)
+        return self.measure(options)
+
+    def measure(self, options):
+        results = {}
+        self.stdout.write(
+            f'{"сценарий":<12} {"p50":>8} {"p95":>8} {"p99":>8} '
+            f'{"SQL":>6} {"rps":>8} {"ошибки":>6}'
+        )
+        for scenario in benchmark.scenarios():
+            if options['only'] and scenario.name not in options['only']:
+                continue
+            metrics = benchmark.run(
+                application, scenario, options['clients'],
+                options['requests'],
+            )
+            results[scenario.name] = metrics
+            self.stdout.write(
+                f'{scenario.name:<12} {metrics["p50_ms"]:>8} '
+                f'{metrics["p95_ms"]:>8} {metrics["p99_ms"]:>8} '
+                f'{metrics["queries"]:>6} {metrics["rps"]:>8} '
+                f'{metrics["errors"]:>6}'
+            )
+        if options['save_baseline']:
+            benchmark.save(results, options['save_baseline'])
+        if options['baseline']:
+            regressions = benchmark.compare(
+                results, benchmark.read(options['baseline']),
+                options['threshold'], options['min_delta'],
+            )
+            for name, metric, before, after in regressions:
+                self.stderr.write(f'{name}: {metric} {before} -> {after}')
+            if regressions:
+                raise CommandError(
+                    f'Регрессия в {len(regressions)} метриках'
+                )
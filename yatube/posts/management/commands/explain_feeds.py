@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts.models import Comment, Post, User
+from posts.views import N_EXEMPLE
+
+
+class Rollback(Exception):
+    pass
+
+
+def feed_queries():
+    """Запросы, которыми views читают ленты и комментарии."""
+    post = Post.objects.order_by('-comments_count').first()
+    author = User.objects.order_by('-stats__posts_count').first()
+    group_post = Post.objects.filter(group__isnull=False).first()
+    queries = {
+        'index': Post.objects.order_by('-pub_date', '-pk'),
+    }
+    if author is not None:
+        queries['profile'] = Post.objects.filter(
+            author=author).order_by('-pub_date', '-pk')
+    if group_post is not None:
+        queries['group'] = Post.objects.filter(
+            group=group_post.group_id).order_by('-pub_date', '-pk')
+    if post is not None:
+        queries['comments'] = Comment.objects.filter(post=post)
+    return {
+        name: queryset[:N_EXEMPLE + 1]
+        for name, queryset in queries.items()
+    }
+
+
+def measure(queryset, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        list(queryset.all())
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+class Command(BaseCommand):
+    help = ('Показывает планы и время запросов лент с индексами и без них '
+            '(индексы удаляются внутри транзакции и восстанавливаются)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def report(self, title, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in feed_queries().items():
+            self.stdout.write(
+                f'{name}: {measure(queryset, repeat):.2f} мс'
+            )
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'    {line}')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        self.report('С индексами', repeat)
+        # новое соединение: иначе sqlite3 отдаст закэшированные планы
+        connection.close()
+        try:
+            with transaction.atomic():
+                # DDL в SQLite и PostgreSQL транзакционен, откат вернет
+                # индексы на место
+                with connection.cursor() as cursor:
+                    for model in (Post, Comment):
+                        for index in model._meta.indexes:
+                            cursor.execute('DROP INDEX {}'.format(
+                                connection.ops.quote_name(index.name)
+                            ))
+                self.report('Без индексов', repeat)
+                raise Rollback
+        except Rollback:
+            pass
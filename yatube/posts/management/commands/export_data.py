@@ -0,0 +1,44 @@
+import contextlib
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает посты, комментарии или подписки '
+            'в JSON Lines или CSV')
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(export.TABLES))
+        parser.add_argument(
+            '--format', choices=export.FORMATS, default='jsonl'
+        )
+        parser.add_argument(
+            '--since', help='только записи не старше даты (ISO 8601)'
+        )
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument(
+            '--output', help='файл для выгрузки, по умолчанию stdout '
+                             '(двоичный поток процесса)'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = export.parse_since(options['since'])
+            except ValueError as error:
+                raise CommandError(error)
+        chunks = export.stream(
+            options['table'], options['format'], since, options['gzip']
+        )
+        if options['output']:
+            output = open(options['output'], 'wb')
+        else:
+            output = contextlib.nullcontext(sys.stdout.buffer)
+        with output as stream:
+            for chunk in chunks:
+                stream.write(chunk)
+            stream.flush()
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import dataset, loader
+
+
+class Command(BaseCommand):
+    help = ('Создает синтетические данные: пользователей, группы, '
+            'подписки, посты и комментарии с реалистичным перекосом '
+            '(одинаковые при одном и том же --seed)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=10000)
+        parser.add_argument(
+            '--image-share', type=float, default=0.1,
+            help='доля постов с картинкой',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='за сколько дней до 2024-01-01 раскидать посты',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--batch-size', type=int, default=loader.BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        if options['posts'] and not options['users']:
+            raise CommandError('Постам нужны авторы: задайте --users')
+        objects = dataset.generate(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            image_share=options['image_share'],
+            days=options['days'],
+            seed=options['seed'],
+        )
+        loaded, seconds = loader.load_objects(
+            objects, options['database'], options['batch_size']
+        )
+        total = sum(loaded.values())
+        for model, count in loaded.items():
+            self.stdout.write(f'{model._meta.label_lower}: {count}')
+        self.stdout.write(
+            f'Создано {total} строк за {seconds:.1f} с '
+            f'({total / max(seconds, 1e-6):.0f} строк/с)'
+        )
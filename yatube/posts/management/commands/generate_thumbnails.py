@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import generate
+
+
+class Command(BaseCommand):
+    help = 'Создает миниатюры картинок всех постов (например, после загрузки)'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only(
+            'image', 'updated', 'group', 'author').iterator()
+        done = 0
+        for post in posts:
+            try:
+                generate(post)
+            except Exception as error:
+                self.stderr.write(f'Пост {post.pk}: {error}')
+                continue
+            done += 1
+        self.stdout.write(f'Миниатюры созданы для {done} постов')
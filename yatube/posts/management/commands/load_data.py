@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from posts import loader
+
+
+class Command(BaseCommand):
+    help = ('Быстро загружает фикстуры (.json) и JSON Lines (.jsonl, '
+            'можно .gz) пачками INSERT без сигналов; рассчитано на пустую '
+            'БД, существующие строки не обновляются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--batch-size', type=int, default=loader.BATCH_SIZE
+        )
+        parser.add_argument(
+            '-e', '--exclude', action='append', default=[],
+            help='app_label или app_label.model, можно несколько раз',
+        )
+        parser.add_argument(
+            '--skip-noise', action='store_true',
+            help='пропустить ' + ', '.join(loader.NOISE),
+        )
+
+    def handle(self, *args, **options):
+        exclude = list(options['exclude'])
+        if options['skip_noise']:
+            exclude += loader.NOISE
+        loaded, seconds = loader.load(
+            options['paths'], options['database'], options['batch_size'],
+            exclude,
+        )
+        total = sum(loaded.values())
+        for model, count in loaded.items():
+            self.stdout.write(f'{model._meta.label_lower}: {count}')
+        self.stdout.write(
+            f'Загружено {total} строк за {seconds:.1f} с '
+            f'({total / max(seconds, 1e-6):.0f} строк/с)'
+        )
@@ -0,0 +1,62 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.css import (CRITICAL_OUTPUT, CRITICAL_TEMPLATES, purge,
+                      template_dirs, template_words)
+
+SOURCE = os.path.join('css', 'bootstrap.min.css')
+OUTPUT = os.path.join('css', 'site.css')
+HEADER = ('{# Создано командой purge_css из %s, не править вручную #}\n'
+          % SOURCE.replace(os.sep, '/'))
+
+
+class Command(BaseCommand):
+    help = ('Оставляет в стилях Bootstrap только используемые шаблонами '
+            'правила (static/css/site.css) и встраивает стили первого '
+            'экрана в base.html (templates/includes/critical_css.html)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='не записывать, а проверить, что файлы не устарели',
+        )
+
+    def handle(self, *args, **options):
+        static_dir = settings.STATICFILES_DIRS[0]
+        with open(os.path.join(static_dir, SOURCE), encoding='utf-8') as file:
+            source = file.read()
+        purged = purge(source, template_words())
+        critical = purge(purged, template_words(CRITICAL_TEMPLATES))
+        outputs = {
+            os.path.join(static_dir, OUTPUT): purged,
+            os.path.join(template_dirs()[0], CRITICAL_OUTPUT): (
+                HEADER + '<style>{% verbatim %}' + critical
+                + '{% endverbatim %}</style>\n'
+            ),
+        }
+        if options['check']:
+            stale = [
+                path for path, content in outputs.items()
+                if not os.path.exists(path)
+                or open(path, encoding='utf-8').read() != content
+            ]
+            if stale:
+                raise CommandError(
+                    'Устарели, запустите purge_css: ' + ', '.join(stale))
+            return
+        for path, content in outputs.items():
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(content)
+        for title, css in (('Исходные стили', source),
+                           ('Урезанные (site.css)', purged),
+                           ('Встроенные в base.html', critical)):
+            self.stdout.write(
+                f'{title}: {len(css.encode())} байт, '
+                f'gzip {len(gzip.compress(css.encode()))} байт'
+            )
+        saved = len(source.encode()) - len(purged.encode())
+        share = saved / len(source.encode()) * 100
+        self.stdout.write(f'Экономия: {saved} байт ({share:.1f}%)')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересоздает полнотекстовый индекс постов (posts_post_fts)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        search.install(options['database'])
+        search.rebuild(options['database'])
+        self.stdout.write('Индекс поиска перестроен')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount
+
+
+class Command(BaseCommand):
+    help = ('Сверяет денормализованные счетчики постов, комментариев '
+            'и подписок с таблицами и исправляет расхождения')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        for model, fixed in recount(options['database']).items():
+            self.stdout.write(f'{model}: исправлено строк {fixed}')
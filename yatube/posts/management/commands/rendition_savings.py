@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from posts.models import Rendition
+
+
+class Command(BaseCommand):
+    help = ('Показывает, сколько байт экономят варианты картинок '
+            'по сравнению с исходными файлами')
+
+    def handle(self, *args, **options):
+        rows = Rendition.objects.values('format', 'geometry').annotate(
+            count=Count('pk'),
+            size=Sum('size'),
+            source_size=Sum('source_size'),
+        ).order_by('format', 'geometry')
+        for row in rows:
+            saved = row['source_size'] - row['size']
+            share = saved / max(row['source_size'], 1) * 100
+            self.stdout.write(
+                f'{row["format"]} {row["geometry"]}: {row["count"]} шт., '
+                f'{row["size"]} из {row["source_size"]} байт, '
+                f'экономия {saved} байт ({share:.1f}%)'
+            )
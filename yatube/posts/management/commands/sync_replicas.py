@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db import sync_replicas
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик '
+            '(заменитель репликации для локальной разработки)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='повторять копирование каждые N секунд',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не заданы (YATUBE_REPLICAS)')
+        while True:
+            sync_replicas()
+            self.stdout.write(
+                f'Скопировано в {", ".join(settings.DATABASE_REPLICAS)}'
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
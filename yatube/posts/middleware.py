@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from core.db import primary_reads
+from . import pagecache
+
+
+def _cached_page(request):
+    """resolver_match страницы, которую можно взять из кэша, или None."""
+    if request.method != 'GET' or not settings.PAGE_CACHE_TIMEOUT:
+        return None
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return None
+    if match.view_name not in pagecache.PAGES:
+        return None
+    return match
+
+
+class AnonymousPageCacheMiddleware:
+    """Отдает гостям страницы лент и постов из кэша целиком.
+
+    Стоит до SessionMiddleware: запрос без куки сессии (и без сообщений)
+    обслуживается без сессии, запросов к БД и шаблонов. Ответ помечается
+    Cache-Control: public с s-maxage для прокси перед сайтом и
+    Vary: Cookie, чтобы прокси не отдавал его вошедшим пользователям.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        match = _cached_page(request)
+        cookies = (settings.SESSION_COOKIE_NAME, CookieStorage.cookie_name)
+        if match is None or any(name in request.COOKIES for name in cookies):
+            return self.get_response(request)
+        key = pagecache.page_key('anon', match, request)
+        entry = cache.get(key)
+        if entry is None:
+            # страница ляжет в кэш под текущей версией ленты
+            with primary_reads():
+                response = self.get_response(request)
+            if response.status_code != 200 or response.cookies:
+                return response
+            entry = (response.content, list(response.items()))
+            cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+        content, headers = entry
+        etag = dict(headers).get('ETag')
+        if etag is not None and etag in request.META.get(
+                'HTTP_IF_NONE_MATCH', ''):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+        else:
+            response = HttpResponse(content)
+            for header, value in headers:
+                response[header] = value
+        patch_cache_control(
+            response, public=True, max_age=0,
+            s_maxage=settings.PAGE_CACHE_PROXY_MAX_AGE,
+        )
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+
+class PageShellMiddleware:
+    """Отдает вошедшим пользователям общий каркас страницы из кэша,
+    заново рисуя только личные куски (см. posts/pagecache.py).
+
+    Стоит после AuthenticationMiddleware и CsrfViewMiddleware: дырки
+    рисуются с request.user и своим csrf-токеном.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        match = _cached_page(request)
+        if match is None or not request.user.is_authenticated:
+            return self.get_response(request)
+        key = pagecache.page_key('shell', match, request)
+        shell = cache.get(key)
+        if shell is None:
+            request.page_shell = True
+            with primary_reads():
+                response = self.get_response(request)
+            if response.status_code != 200:
+                return response
+            content = response.content.decode(response.charset)
+            cache.set(
+                key, pagecache.make_shell(content),
+                settings.PAGE_CACHE_TIMEOUT,
+            )
+            response.content = pagecache.unmark(content)
+        else:
+            # шапка подсвечивает текущий раздел по resolver_match
+            request.resolver_match = match
+            response = HttpResponse(pagecache.fill(request, shell))
+        patch_cache_control(response, private=True)
+        return response
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-18 15:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Rendition',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geometry', models.CharField(max_length=20, verbose_name='Размер')),
+                ('format', models.CharField(max_length=10, verbose_name='Формат')),
+                ('size', models.PositiveIntegerField(verbose_name='Вес, байт')),
+                ('source_size', models.PositiveIntegerField(verbose_name='Вес исходника, байт')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='posts.Post')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='rendition',
+            constraint=models.UniqueConstraint(fields=('post', 'geometry', 'format'), name='unique_rendition'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 2.2.16 on 2026-10-18 15:06
+
+import base64
+import io
+
+from django.db import migrations, models
+from PIL import Image, ImageFilter
+
+PLACEHOLDER_SIZE = 16
+PALETTE_COLORS = 5
+
+
+def describe(file):
+    """Копия posts.images.describe на момент миграции: изменения
+    приложения не должны менять историю миграций."""
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        image.draft('RGB', (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+        small = image.convert('RGB')
+    file.seek(0)
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    palette = small.quantize(colors=PALETTE_COLORS)
+    _, index = max(palette.getcolors())
+    red, green, blue = palette.getpalette()[index * 3:index * 3 + 3]
+    buffer = io.BytesIO()
+    small.filter(ImageFilter.GaussianBlur(1)).save(
+        buffer, 'JPEG', quality=40
+    )
+    placeholder = base64.b64encode(buffer.getvalue()).decode()
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_color': f'#{red:02x}{green:02x}{blue:02x}',
+        'image_placeholder': f'data:image/jpeg;base64,{placeholder}',
+    }
+
+
+def fill_image_previews(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    for post in Post.objects.exclude(image='').only('image').iterator():
+        try:
+            with post.image.open('rb') as file:
+                values = describe(file)
+        except (OSError, ValueError):
+            # файла нет или он не картинка: поля останутся пустыми
+            continue
+        Post.objects.filter(pk=post.pk).update(**values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_rendition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Основной цвет картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+        migrations.RunPython(
+            fill_image_previews, migrations.RunPython.noop
+        ),
+    ]
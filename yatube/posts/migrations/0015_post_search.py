@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from posts import search
+
+
+def create_index(apps, schema_editor):
+    search.install(schema_editor.connection.alias)
+    search.rebuild(schema_editor.connection.alias)
+
+
+def drop_index(apps, schema_editor):
+    search.uninstall(schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_image_preview'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
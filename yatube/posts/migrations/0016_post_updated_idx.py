@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['updated'], name='post_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_pulled(apps, schema_editor):
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.filter(
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).update(pulled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='pulled',
+            field=models.BooleanField(
+                default=False, verbose_name='Читается при запросе'
+            ),
+        ),
+        migrations.RunPython(mark_pulled, migrations.RunPython.noop),
+    ]
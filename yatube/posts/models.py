@@ -15,9 +15,15 @@ class Group(models.Model):
         return self.title
 
 
+# счетчики поста, которые меняются только в posts/counters.py
+COUNTERS = ('comments_count',)
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст', help_text='Текст поста')
     pub_date = models.DateTimeField(auto_now_add=True)
+    # меняется при каждом сохранении и входит в ключ кэша карточки
+    updated = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -39,15 +45,63 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    # заполняются при загрузке картинки (см. posts/images.py), а не через
+    # width_field/height_field: те открывают файл при каждом чтении
+    # поста, у которого размеры еще не записаны
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, editable=False
+    )
+    image_color = models.CharField(
+        'Основной цвет картинки', max_length=7, blank=True, editable=False
+    )
+    image_placeholder = models.TextField(
+        'Превью картинки', blank=True, editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Посты пользователей'
         verbose_name_plural = 'Посты пользователей'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['pub_date', 'id'], name='post_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date'], name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'], name='post_group_pub_date_idx'
+            ),
+            # MAX(updated) для ETag ленты (posts/etags.py)
+            models.Index(fields=['updated'], name='post_updated_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        """Сохранение уже существующего поста не переписывает
+        денормализованные счетчики значениями, загруженными вместе с
+        постом: их сдвигают только атомарные UPDATE (posts/counters.py),
+        и комментарий, добавленный между загрузкой и сохранением,
+        иначе потерялся бы."""
+        if (not self._state.adding and not args
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTERS
+            ]
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('space_posts:post_detail', kwargs={'post_id': self.pk})
 
@@ -70,6 +124,14 @@ class Comment(models.Model):
     )
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        ordering = ['created']
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.text
 
@@ -86,5 +148,92 @@ class Follow(models.Model):
         related_name='following',
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow',
+            ),
+        ]
+
     def __str__(self):
         return f'{self.user}-->{self.author}'
+
+
+class UserStats(models.Model):
+    """Денормализованные счетчики пользователя, поддерживаются
+    сигналами (см. posts/counters.py)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков', default=0
+    )
+    following_count = models.PositiveIntegerField('Число подписок', default=0)
+    # посты автора не рассылаются по лентам, а подмешиваются при
+    # чтении (posts/timeline.py)
+    pulled = models.BooleanField('Читается при запросе', default=False)
+
+    def __str__(self):
+        return f'{self.user}: {self.posts_count}'
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок: пост автора,
+    на которого подписан user. Заполняется при публикации поста
+    (fan-out-on-write), см. posts/timeline.py."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.post_id}'
+
+
+class Rendition(models.Model):
+    """Вариант картинки поста (размер и формат) и его вес в сравнении
+    с исходным файлом. Записывается при создании миниатюр,
+    см. posts/thumbnails.py."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='renditions',
+    )
+    geometry = models.CharField('Размер', max_length=20)
+    format = models.CharField('Формат', max_length=10)
+    size = models.PositiveIntegerField('Вес, байт')
+    source_size = models.PositiveIntegerField('Вес исходника, байт')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'geometry', 'format'],
+                name='unique_rendition',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id}: {self.geometry} {self.format}'
+
+    @property
+    def saved(self):
+        return self.source_size - self.size
@@ -0,0 +1,110 @@
+"""Кэш целых страниц лент и постов.
+
+Гостю (без куки сессии) страница отдается из кэша целиком, до разбора
+сессии, запросов к БД и шаблонов. Вошедшему пользователю отдается общий
+для всех «каркас» страницы, в котором заново рисуются только личные
+куски - «дырки» (шапка, кнопка подписки, ссылка на правку, форма
+комментария). Дырка в шаблоне - тег ``{% hole 'шаблон' ключ=значение %}``
+(posts/templatetags/holes.py): при построении каркаса ее содержимое
+заменяется меткой с именем шаблона и аргументами, по которым дырка
+перерисовывается для каждого запроса.
+
+В ключ страницы входят версия главной ленты (сдвигается при любой
+правке поста, группы или автора, см. posts/feeds.py) и, для профиля и
+поста, версия самой страницы (подписки, комментарии), поэтому
+устаревшие страницы просто перестают находиться в кэше.
+"""
+import base64
+import hashlib
+import json
+import re
+
+from django.template.loader import render_to_string
+
+from . import feeds
+from .forms import CommentForm
+from .models import Follow
+
+# страницы, которые кэшируются, и их дополнительная версия
+PAGES = {
+    'space_posts:posts': None,
+    'space_posts:group_list': None,
+    'space_posts:profile': lambda kwargs: feeds.profile_page(
+        kwargs['username']),
+    'space_posts:post_detail': lambda kwargs: feeds.post_page(
+        kwargs['post_id']),
+}
+HOLE = re.compile(r'<!--hole:([\w=-]+)-->(.*?)<!--/hole-->', re.S)
+EMPTY_HOLE = re.compile(r'<!--hole:([\w=-]+)-->')
+
+
+def page_key(kind, match, request):
+    """Ключ страницы: kind - 'anon' или 'shell'."""
+    names = [feeds.INDEX, feeds.ALL_FEEDS]
+    extra = PAGES[match.view_name]
+    if extra is not None:
+        names.append(extra(match.kwargs))
+    version = feeds.versions(*names)
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{kind}:{version}:{path}'
+
+
+def follow_button(request, username):
+    user = request.user
+    following = user.is_authenticated and Follow.objects.filter(
+        user=user, author__username=username).exists()
+    return {
+        'username': username,
+        'following': following,
+        'user_is_author': user.get_username() == username,
+    }
+
+
+def edit_link(request, post_id, author_id):
+    return {'post_id': post_id, 'can_edit': request.user.pk == author_id}
+
+
+def comment_form(request, post_id):
+    return {'post_id': post_id, 'form': CommentForm()}
+
+
+# шаблоны дырок и функции, строящие их контекст по аргументам тега
+HOLES = {
+    'includes/header.html': None,
+    'includes/follow_button.html': follow_button,
+    'includes/edit_link.html': edit_link,
+    'includes/comment_form.html': comment_form,
+}
+
+
+def render_hole(request, template, kwargs):
+    build = HOLES[template]
+    context = build(request, **kwargs) if build is not None else {}
+    return render_to_string(template, context, request)
+
+
+def mark_hole(template, kwargs, content):
+    payload = base64.urlsafe_b64encode(
+        json.dumps([template, kwargs]).encode()).decode()
+    return f'<!--hole:{payload}-->{content}<!--/hole-->'
+
+
+def _unpack(match):
+    return json.loads(base64.urlsafe_b64decode(match.group(1).encode()))
+
+
+def make_shell(content):
+    """Каркас страницы: содержимое дырок заменено метками."""
+    return HOLE.sub(lambda match: f'<!--hole:{match.group(1)}-->', content)
+
+
+def unmark(content):
+    """Страница без меток дырок."""
+    return HOLE.sub(lambda match: match.group(2), content)
+
+
+def fill(request, shell):
+    """Рисует дырки каркаса для текущего пользователя."""
+    return EMPTY_HOLE.sub(
+        lambda match: render_hole(request, *_unpack(match)), shell
+    )
@@ -0,0 +1,260 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from core.cache import get_or_build
+from core.db import estimated_count, primary_reads
+from .feeds import feed_version
+
+# число первых страниц, доступных по номеру (?page=N),
+# дальше лента листается только курсором (?cursor=...)
+NUMBERED_PAGES: int = 10
+# сколько номеров страниц показывать по обе стороны от текущей
+WINDOW: int = 2
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, post=None):
+    """Упаковывает направление и позицию (pub_date, id) в токен."""
+    payload = [direction]
+    if post is not None:
+        payload += [post.pub_date.isoformat(), post.pk]
+    token = base64.urlsafe_b64encode(json.dumps(payload).encode())
+    return token.decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает (направление, (pub_date, id) или None) либо None,
+    если токен испорчен."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, *position = json.loads(
+            base64.urlsafe_b64decode(padded.encode())
+        )
+        if direction not in (NEXT, PREVIOUS):
+            return None
+        if not position:
+            return direction, None
+        pub_date, pk = position
+        pub_date = parse_datetime(pub_date)
+        if pub_date is None:
+            return None
+        return direction, (pub_date, int(pk))
+    except (ValueError, TypeError):
+        return None
+
+
+class FeedPaginator(Paginator):
+    """Пагинатор ленты по ключу (pub_date, id).
+
+    Первые NUMBERED_PAGES страниц отдаются по номеру, все последующие -
+    по курсору, поэтому глубокие страницы не требуют ни OFFSET,
+    ни полного COUNT(*). Если задано имя ленты feed, номерные страницы
+    (самые посещаемые) кэшируются до изменения ленты и лент depends.
+    """
+    numbered_pages = NUMBERED_PAGES
+
+    def __init__(self, object_list, per_page, feed=None, depends=(),
+                 **kwargs):
+        super().__init__(
+            object_list.order_by('-pub_date', '-pk'), per_page, **kwargs
+        )
+        self.feed = feed
+        self.depends = depends
+        self._bounded_count = None
+        self._feed_version = None
+
+    def _cached(self, suffix, build):
+        if self.feed is None:
+            return build()
+        if self._feed_version is None:
+            self._feed_version = feed_version(self.feed, *self.depends)
+        key = f'{self.feed}:{self._feed_version}:{self.per_page}:{suffix}'
+
+        def build_on_primary():
+            with primary_reads():
+                return build()
+        return get_or_build(key, build_on_primary, settings.FEED_PAGE_TIMEOUT)
+
+    @property
+    def bounded_count(self):
+        """COUNT(*), ограниченный объемом номерных страниц (+1 запись,
+        чтобы понять, есть ли что-то дальше)."""
+        if self._bounded_count is None:
+            limit = self.numbered_pages * self.per_page
+            self._bounded_count = self._cached(
+                'count', self.object_list[:limit + 1].count
+            )
+        return self._bounded_count
+
+    @cached_property
+    def total(self):
+        """(число записей ленты, оценка ли это). До
+        ESTIMATED_COUNT_THRESHOLD - точный COUNT(*), дальше - оценка из
+        статистики СУБД для всей ленты или сам порог для отфильтрованной.
+        Кэшируется до изменения ленты."""
+        if self.bounded_count <= self.numbered_pages * self.per_page:
+            return self.bounded_count, False
+        return tuple(self._cached('total', self._count))
+
+    @property
+    def count(self):
+        return self.total[0]
+
+    @property
+    def count_is_estimate(self):
+        return self.total[1]
+
+    def _count(self):
+        threshold = settings.ESTIMATED_COUNT_THRESHOLD
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate > threshold:
+                return estimate, True
+        count = queryset[:threshold + 1].count()
+        return min(count, threshold), count > threshold
+
+    @property
+    def numbered_count(self):
+        limit = self.numbered_pages * self.per_page
+        count = min(self.bounded_count, limit)
+        return max(-(-count // self.per_page), 1)
+
+    @property
+    def num_pages(self):
+        return self.numbered_count
+
+    def page_window(self, number=None):
+        """Номера страниц для ссылок: первая, последняя номерная и WINDOW
+        соседних с текущей; None - пропуск («…»). Для курсорной
+        страницы (number=None) - первые номера и пропуск."""
+        last = self.numbered_count
+        if number is None:
+            window = list(range(1, min(WINDOW + 1, last) + 1))
+            return window + [None]
+        if last <= 2 * WINDOW + 3:
+            return list(range(1, last + 1))
+        low = max(number - WINDOW, 2)
+        high = min(number + WINDOW, last - 1)
+        window = [1]
+        if low > 2:
+            window.append(None)
+        window += range(low, high + 1)
+        if high < last - 1:
+            window.append(None)
+        window.append(last)
+        return window
+
+    @property
+    def last_query(self):
+        if self.bounded_count > self.numbered_pages * self.per_page:
+            return f'cursor={encode_cursor(PREVIOUS)}'
+        return f'page={self.numbered_count}'
+
+    def get_feed_page(self, number=None, cursor=None):
+        position = decode_cursor(cursor) if cursor else None
+        if position is None:
+            return self.get_numbered_page(number)
+        direction, key = position
+        if direction == NEXT and key is not None:
+            return self._page_after(key, cursor)
+        return self._page_before(key, cursor)
+
+    def get_numbered_page(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 1
+        number = min(max(number, 1), self.numbered_count)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        object_list = self._cached(
+            f'page:{number}', lambda: list(self.object_list[bottom:top])
+        )
+        has_next = self.bounded_count > top
+        return self._page(object_list, number, has_next, number > 1)
+
+    def _page_after(self, key, cursor):
+        pub_date, pk = key
+        rows = list(self.object_list.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        )[:self.per_page + 1])
+        if not rows:
+            return self.get_numbered_page(1)
+        has_next = len(rows) > self.per_page
+        return self._page(rows[:self.per_page], None, has_next, True, cursor)
+
+    def _page_before(self, key, cursor):
+        queryset = self.object_list.order_by('pub_date', 'pk')
+        if key is not None:
+            pub_date, pk = key
+            queryset = queryset.filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+            )
+        rows = list(queryset[:self.per_page + 1])
+        if key is not None and 0 < len(rows) < self.per_page:
+            # до начала ленты меньше страницы: первая номерная страница
+            # повторила бы посты страницы, с которой пришли
+            return self._page(rows[::-1], None, True, False, cursor)
+        if len(rows) <= self.per_page:
+            # дошли до начала ленты
+            return self.get_numbered_page(1)
+        rows = rows[:self.per_page][::-1]
+        return self._page(rows, None, key is not None, True, cursor)
+
+    def _page(self, object_list, number, has_next, has_previous,
+              cursor=None):
+        """Обычный Page с навигацией ленты.
+
+        У курсорной страницы number равен None, а ссылки вперед/назад
+        ведут на ?page= в пределах номерных страниц и на ?cursor= за ними.
+        """
+        page = Page(object_list, number, self)
+        page.has_next = lambda: has_next
+        page.has_previous = lambda: has_previous
+        page.cursor = cursor
+        page.window = self.page_window(number)
+        page.next_query = page.previous_query = None
+        if has_next:
+            if number and number < self.numbered_count:
+                page.next_query = f'page={number + 1}'
+            else:
+                token = encode_cursor(NEXT, object_list[-1])
+                page.next_query = f'cursor={token}'
+        if has_previous:
+            if number:
+                page.previous_query = f'page={number - 1}'
+            else:
+                token = encode_cursor(PREVIOUS, object_list[0])
+                page.previous_query = f'cursor={token}'
+        return page
+
+
+def get_page_obj(request, queryset, per_page, feed=None, depends=()):
+    """Страница ленты по параметрам ?page= или ?cursor= запроса."""
+    paginator = FeedPaginator(queryset, per_page, feed=feed, depends=depends)
+    return paginator.get_feed_page(
+        request.GET.get('page'), request.GET.get('cursor')
+    )
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который для выборки без фильтров по большой таблице
+    (больше ESTIMATED_COUNT_THRESHOLD строк) берет число записей из
+    статистики СУБД вместо COUNT(*). Нужен админке."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate > settings.ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
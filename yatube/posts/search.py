@@ -0,0 +1,159 @@
+import base64
+import json
+import re
+
+from django.db import connections, router
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+# FTS5-таблица с внешним содержимым: хранит только индекс по
+# posts_post.text и синхронизируется триггерами
+FTS_TABLE = 'posts_post_fts'
+# SQLite пересоздает таблицу при AddField/AlterField и теряет ее
+# триггеры, поэтому они создаются заново после каждого migrate
+# (см. PostsConfig.ready)
+INSTALL_SQL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, content='posts_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+)
+SNIPPET_TOKENS: int = 16
+# маркеры совпадений в snippet(): текст поста экранируется целиком,
+# и лишь затем маркеры заменяются на <mark>
+MARK_START = '\x02'
+MARK_END = '\x03'
+WORD = re.compile(r'\w+')
+
+
+def install(using='default', **kwargs):
+    """Создает индекс и триггеры, если их нет."""
+    connection = connections[using]
+    if Post._meta.db_table not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        for sql in INSTALL_SQL:
+            cursor.execute(sql)
+
+
+def match_query(text):
+    """Запрос MATCH из пользовательской строки: каждое слово ищется
+    по префиксу, все слова обязательны. Синтаксис FTS5 (кавычки,
+    операторы, колонки) из строки не пропускается."""
+    return ' '.join(f'"{word}"*' for word in WORD.findall(text.lower()))
+
+
+def encode_cursor(rank, pk):
+    token = base64.urlsafe_b64encode(json.dumps([rank, pk]).encode())
+    return token.decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """(rank, id) последнего результата страницы или None."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        rank, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(rank), int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def search(text, per_page, cursor=None):
+    """Страница результатов поиска по постам, лучшие совпадения
+    (по bm25) первыми. Возвращает (посты, курсор следующей страницы
+    или None); у каждого поста есть snippet с подсветкой совпадений."""
+    query = match_query(text)
+    if not query:
+        return [], None
+    position = decode_cursor(cursor) if cursor else None
+    # bm25() нельзя сравнивать в WHERE того же запроса, где MATCH,
+    # поэтому условие курсора накладывается снаружи
+    sql = (
+        f'SELECT id, score, snippet FROM ('
+        f'SELECT rowid AS id, bm25({FTS_TABLE}) AS score, '
+        f'snippet({FTS_TABLE}, 0, %s, %s, %s, %s) AS snippet '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)'
+    )
+    params = [MARK_START, MARK_END, '…', SNIPPET_TOKENS, query]
+    if position is not None:
+        sql += ' WHERE score > %s OR score = %s AND id > %s'
+        params += [position[0], position[0], position[1]]
+    sql += ' ORDER BY score, id LIMIT %s'
+    params.append(per_page + 1)
+    # индекс и посты читаются из одной базы, иначе найденные на
+    # основной базе посты могли бы не найтись на отстающей реплике
+    using = router.db_for_read(Post) or 'default'
+    with connections[using].cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        rows = db_cursor.fetchall()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    posts = Post.objects.using(using).select_related(
+        'author', 'group'
+    ).in_bulk(
+        [pk for pk, _, _ in rows]
+    )
+    results = []
+    for pk, rank, snippet in rows:
+        post = posts.get(pk)
+        if post is None:
+            continue
+        post.snippet = highlight(snippet)
+        results.append(post)
+    next_cursor = None
+    if has_next:
+        last_pk, last_rank, _ = rows[-1]
+        next_cursor = encode_cursor(last_rank, last_pk)
+    return results, next_cursor
+
+
+def filter_posts(queryset, text):
+    """Посты queryset, найденные по индексу (для админки)."""
+    query = match_query(text)
+    if not query:
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [query],
+    ))
+
+
+def uninstall(using='default'):
+    with connections[using].cursor() as cursor:
+        for name in ('insert', 'delete', 'update'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def rebuild(using='default'):
+    """Перестраивает индекс по текущему содержимому posts_post."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')"
+        )
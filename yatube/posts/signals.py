@@ -0,0 +1,181 @@
+import logging
+
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cards, counters, feeds, timeline
+from .images import describe
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+logger = logging.getLogger(__name__)
+# поля пользователя, которые выводятся в карточке поста
+CARD_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=User)
+def user_stats_create(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def post_count_up(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_user(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_count_down(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_count_up(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change(Post, instance.post_id, 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_count_down(sender, instance, **kwargs):
+    counters.change(Post, instance.post_id, 'comments_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_bump_page(sender, instance, **kwargs):
+    feeds.bump_post_page(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_count_up(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_user(instance.author_id, 'followers_count', 1)
+        counters.change_user(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_count_down(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, 'followers_count', -1)
+    counters.change_user(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_backfill(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.follower_joined(instance.author_id)
+        timeline.backfill(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_prune(sender, instance, **kwargs):
+    timeline.prune(instance.user, instance.author)
+    timeline.follower_left(instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_bump_pages(sender, instance, **kwargs):
+    feeds.bump_profile_pages(
+        instance.user.username, instance.author.username
+    )
+    feeds.bump_follow_feed(instance.user_id)
+
+
+def touch_posts(**lookups):
+    """Сдвигает updated у постов, меняя ключи их карточек в кэше."""
+    Post.objects.filter(**lookups).update(updated=timezone.now())
+    feeds.bump_all_feeds()
+
+
+@receiver(pre_save, sender=Post)
+def post_image_describe(sender, instance, raw=False, **kwargs):
+    """Записывает размеры, цвет и превью только что загруженной
+    картинки поста (уже сохраненные файлы не перечитываются)."""
+    if raw:
+        return
+    if not instance.image:
+        values = dict.fromkeys(('image_width', 'image_height'))
+        values.update(image_color='', image_placeholder='')
+    elif instance.image._committed:
+        return
+    else:
+        try:
+            values = describe(instance.image)
+        except (OSError, ValueError):
+            logger.exception('Не удалось прочитать картинку поста')
+            return
+    for field, value in values.items():
+        setattr(instance, field, value)
+
+
+@receiver(pre_save, sender=Post)
+def post_bump_old_feeds(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    old = Post.objects.filter(pk=instance.pk).values_list(
+        'group', 'author').first()
+    if old is not None and old != (instance.group_id, instance.author_id):
+        feeds.bump_post_feeds(*old)
+
+
+@receiver(post_save, sender=Post)
+def post_bump_feeds(sender, instance, **kwargs):
+    feeds.bump_post_feeds(instance.group_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_forget_cards(sender, instance, **kwargs):
+    cards.forget_cards(instance)
+    feeds.bump_post_feeds(instance.group_id, instance.author_id)
+
+
+@receiver(post_save, sender=Group)
+def group_touch_posts(sender, instance, created, **kwargs):
+    if not created:
+        touch_posts(group=instance)
+
+
+@receiver(pre_delete, sender=Group)
+def group_delete_touch_posts(sender, instance, **kwargs):
+    touch_posts(group=instance)
+
+
+@receiver(pre_save, sender=User)
+def author_remember_card_fields(sender, instance, raw=False,
+                                update_fields=None, **kwargs):
+    """Запоминает выводимые в карточке поля до сохранения, чтобы после
+    него сравнить их с новыми (смена пароля, вход и правки в админке их
+    не меняют)."""
+    instance._card_fields = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not CARD_USER_FIELDS & set(
+            update_fields):
+        # например, last_login при входе
+        return
+    instance._card_fields = User.objects.filter(pk=instance.pk).values(
+        *CARD_USER_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def author_touch_posts(sender, instance, created, **kwargs):
+    old = getattr(instance, '_card_fields', None)
+    if created or old is None:
+        return
+    if all(old[name] == getattr(instance, name) for name in old):
+        return
+    posts = Post.objects.filter(author=instance)
+    groups = set(
+        posts.exclude(group=None).values_list('group', flat=True).distinct()
+    )
+    posts.update(updated=timezone.now())
+    feeds.bump_author_feeds(instance.pk, groups)
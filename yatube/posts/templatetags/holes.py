@@ -0,0 +1,17 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts import pagecache
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **kwargs):
+    """Личный кусок страницы: рисуется по шаблону и аргументам, а в
+    каркасе страницы для вошедших пользователей остается меткой."""
+    request = context['request']
+    content = pagecache.render_hole(request, template_name, kwargs)
+    if getattr(request, 'page_shell', False):
+        content = pagecache.mark_hole(template_name, kwargs, content)
+    return mark_safe(content)
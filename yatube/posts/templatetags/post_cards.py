@@ -0,0 +1,12 @@
+from django import template
+
+from posts.cards import attach_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def prefetch_cards(page_obj, variant='feed'):
+    """Готовит post.card для всех постов страницы."""
+    attach_cards(page_obj.object_list, variant)
+    return ''
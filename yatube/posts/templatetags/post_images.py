@@ -0,0 +1,19 @@
+from django import template
+
+from posts.thumbnails import picture
+
+register = template.Library()
+
+# карточка занимает всю ширину экрана на телефоне и до 900px на десктопе
+DEFAULT_SIZES = '(min-width: 992px) 900px, 100vw'
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, sizes=DEFAULT_SIZES, lazy=False):
+    """<picture> с вариантами картинки поста в srcset. В лентах
+    (lazy=True) картинка грузится лениво и не создается на лету."""
+    return {
+        'image': picture(post, create=not lazy),
+        'sizes': sizes,
+        'lazy': lazy,
+    }
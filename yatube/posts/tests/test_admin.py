@@ -0,0 +1,160 @@
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.admin import helpers
+from django.contrib.auth.models import User as AdminUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from .. import timeline
+from ..admin import ScalableAdmin
+from ..models import (Comment, Follow, Group, Post, TimelineEntry, User,
+                      UserStats)
+
+
+class AdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = AdminUser.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.author = User.objects.create_user(username='Толстой')
+        cls.reader = User.objects.create_user(username='Читатель')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {i}')
+            for i in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def action(self, model, name, objects, **data):
+        return self.client.post(
+            reverse(f'admin:posts_{model}_changelist'),
+            {
+                'action': name,
+                helpers.ACTION_CHECKBOX_NAME: [obj.pk for obj in objects],
+                **data,
+            },
+        )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        return len(context)
+
+    def test_changelists_do_not_depend_on_row_count(self):
+        """Число запросов списка не растет вместе с числом строк."""
+        urls = [
+            reverse(f'admin:posts_{model}_changelist')
+            for model in ('post', 'comment', 'follow')
+        ]
+        before = [self.count_queries(url) for url in urls]
+        readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(3)
+        ]
+        Follow.objects.bulk_create([
+            Follow(user=reader, author=self.author) for reader in readers
+        ])
+        Comment.objects.bulk_create([
+            Comment(post=post, author=self.reader, text='Еще')
+            for post in self.posts
+        ])
+        Post.objects.bulk_create([
+            Post(author=reader, text='Еще', group=self.group)
+            for reader in readers
+        ])
+        self.assertEqual([self.count_queries(url) for url in urls], before)
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=0)
+    def test_unfiltered_count_is_estimated(self):
+        """Без фильтров число записей берется из статистики."""
+        last = Post.objects.order_by('pk').last()
+        Post.objects.filter(pk=self.posts[0].pk).delete()
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertEqual(response.context['cl'].result_count, last.pk)
+
+    def test_move_to_group(self):
+        """Действие переносит посты в группу и обновляет их."""
+        before = self.posts[0].updated
+        self.action(
+            'post', 'move_to_group', self.posts[:2], group=self.group.pk
+        )
+        self.assertEqual(self.group.posts.count(), 2)
+        self.posts[0].refresh_from_db()
+        self.assertGreater(self.posts[0].updated, before)
+
+    def test_move_without_group_needs_confirmation(self):
+        """Без выбранной группы посты не теряют группу, пока перенос
+        «без группы» не подтвержден."""
+        Post.objects.filter(
+            pk__in=[post.pk for post in self.posts[:2]]
+        ).update(group=self.group)
+        self.action('post', 'move_to_group', self.posts[:2])
+        self.assertEqual(self.group.posts.count(), 2)
+        self.action('post', 'move_to_group', self.posts[:2], no_group='on')
+        self.assertEqual(self.group.posts.count(), 0)
+
+    def test_delete_posts_keeps_counters(self):
+        """Удаление постов порциями чистит связанные строки и счетчики."""
+        self.action('post', 'delete_in_chunks', self.posts[:2])
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertFalse(Comment.objects.filter(post=self.posts[0]).exists())
+        self.assertEqual(TimelineEntry.objects.count(), 3)
+        self.author.stats.refresh_from_db()
+        self.assertEqual(self.author.stats.posts_count, 3)
+
+    def test_delete_comments_and_follows_keep_counters(self):
+        """Удаление комментариев и подписок поправляет счетчики и ленты."""
+        self.action('comment', 'delete_in_chunks', Comment.objects.all())
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].comments_count, 0)
+        self.action('follow', 'delete_in_chunks', Follow.objects.all())
+        self.author.stats.refresh_from_db()
+        self.reader.stats.refresh_from_db()
+        self.assertEqual(self.author.stats.followers_count, 0)
+        self.assertEqual(self.reader.stats.following_count, 0)
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_delete_without_bulk_function(self):
+        """Наследник ScalableAdmin без bulk_delete удаляет обычным
+        queryset.delete()."""
+        model_admin = ScalableAdmin(Group, admin.site)
+        with mock.patch.object(model_admin, 'message_user') as message:
+            model_admin.delete_in_chunks(None, Group.objects.all())
+        self.assertFalse(Group.objects.exists())
+        message.assert_called_once_with(None, 'Удалено записей: 1')
+
+    @override_settings(
+        TIMELINE_FANOUT_LIMIT=2, TIMELINE_PUSH_LIMIT=2, TIMELINE_WORKERS=0
+    )
+    @mock.patch.object(
+        timeline.transaction, 'on_commit', lambda func: func()
+    )
+    def test_delete_follows_pushes_author_under_limit(self):
+        """Автор, опустившийся ниже порога рассылки после массовой
+        отписки, переносит посты в ленты оставшихся подписчиков."""
+        others = [
+            User.objects.create_user(username=f'Другой {i}') for i in range(2)
+        ]
+        for user in others:
+            Follow.objects.create(user=user, author=self.author)
+        self.assertTrue(UserStats.objects.get(user=self.author).pulled)
+        post = Post.objects.create(author=self.author, text='Без рассылки')
+        self.action('follow', 'delete_in_chunks',
+                    Follow.objects.filter(user__in=others))
+        self.assertFalse(UserStats.objects.get(user=self.author).pulled)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import TestCase
+from yatube.wsgi import application
+from .. import benchmark
+from ..models import Comment, Follow, Group, Post, User
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Толстой')
+        cls.reader = User.objects.create_user(username='Читатель')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Война и мир', group=group
+        )
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ок')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_scenarios_run_through_wsgi(self):
+        """Все сценарии, включая запись, проходят без ошибок."""
+        scenarios = {item.name: item for item in benchmark.scenarios()}
+        self.assertEqual(set(scenarios), {
+            'index_deep', 'group', 'profile', 'post_detail', 'search',
+            'follow', 'create', 'comment',
+        })
+        for name, scenario in scenarios.items():
+            with self.subTest(scenario=name):
+                metrics = benchmark.run(
+                    application, scenario, clients=1, requests=2
+                )
+                self.assertEqual(metrics['errors'], 0)
+                self.assertGreater(metrics['rps'], 0)
+        self.assertEqual(self.post.comments.count(), 3)
+        self.assertEqual(Post.objects.filter(author=self.reader).count(), 2)
+
+    def test_compare_with_baseline(self):
+        """Регрессия - рост сверх порога и сверх шума."""
+        baseline = {'index': {'p95_ms': 10.0, 'queries': 3}}
+        self.assertEqual(benchmark.compare(
+            {'index': {'p95_ms': 11.0, 'queries': 3}}, baseline), [])
+        self.assertEqual(benchmark.compare(
+            {'index': {'p95_ms': 15.0, 'queries': 4}}, baseline), [
+            ('index', 'p95_ms', 10.0, 15.0), ('index', 'queries', 3, 4),
+        ])
+
+    def test_percentile(self):
+        """Перцентиль по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 0.5), 50)
+        self.assertEqual(benchmark.percentile(values, 0.99), 99)
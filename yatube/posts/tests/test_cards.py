@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from ..models import Group, Post, User
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Толстой')
+        cls.group = Group.objects.create(
+            title='Группа-1', slug='test-slug-1', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Текст поста'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.urls = (
+            reverse('space_posts:posts'),
+            reverse('space_posts:group_list', kwargs={'slug': 'test-slug-1'}),
+            reverse('space_posts:profile', kwargs={'username': 'Толстой'}),
+        )
+
+    def test_group_change_refreshes_cards(self):
+        """Переименование группы сразу видно во всех лентах."""
+        self.guest_client.get(self.urls[0])
+        self.group.title = 'Новое название'
+        self.group.save()
+        response = self.guest_client.get(self.urls[0])
+        self.assertContains(response, 'Новое название')
+
+    def test_author_change_refreshes_cards(self):
+        """Смена имени автора сразу видна в карточках."""
+        for url in self.urls:
+            self.guest_client.get(url)
+        self.user.first_name = 'Лев'
+        self.user.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Лев')
+
+    def test_login_keeps_cards(self):
+        """Вход пользователя не сбрасывает карточки его постов."""
+        updated = self.post.updated
+        self.user.save(update_fields=['last_login'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated, updated)
+
+    def test_password_change_keeps_cards(self):
+        """Смена пароля и другие правки без полей карточки не трогают
+        посты автора."""
+        updated = self.post.updated
+        self.user.set_password('новый-пароль')
+        self.user.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated, updated)
@@ -0,0 +1,119 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from ..models import Comment, Follow, Post, User, UserStats
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Толстой')
+        cls.reader = User.objects.create_user(username='Читатель')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_and_comment_counters(self):
+        """Счетчики постов и комментариев следуют за созданием
+        и удалением записей."""
+        post = Post.objects.create(author=self.author, text='Текст')
+        Post.objects.create(author=self.author, text='Текст 2')
+        self.assertEqual(self.stats(self.author).posts_count, 2)
+        self.authorized_client.post(
+            reverse('space_posts:add_comment', kwargs={'post_id': post.pk}),
+            data={'text': 'Комментарий'},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        Comment.objects.filter(post=post).delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+
+    def test_follow_counters(self):
+        """Счетчики подписчиков и подписок следуют за подпиской."""
+        self.authorized_client.get(reverse(
+            'space_posts:profile_follow', kwargs={'username': self.author}
+        ))
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.authorized_client.get(reverse(
+            'space_posts:profile_unfollow', kwargs={'username': self.author}
+        ))
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_views_read_counters(self):
+        """profile и post_detail берут число постов из счетчика."""
+        post = Post.objects.create(author=self.author, text='Текст')
+        UserStats.objects.filter(user=self.author).update(posts_count=42)
+        response = self.authorized_client.get(reverse(
+            'space_posts:profile', kwargs={'username': self.author}
+        ))
+        self.assertEqual(response.context['number_posts'], 42)
+        response = self.authorized_client.get(reverse(
+            'space_posts:post_detail', kwargs={'post_id': post.pk}
+        ))
+        self.assertEqual(response.context['number_posts'], 42)
+
+    def test_drifted_counters_do_not_break_deletes(self):
+        """Удаление при разошедшемся нулевом счетчике проходит, счетчик
+        остается нулем; страницы открываются без строки UserStats."""
+        post = Post.objects.create(author=self.author, text='Текст')
+        Comment.objects.bulk_create(
+            [Comment(post=post, author=self.reader, text='Текст')]
+        )
+        Comment.objects.filter(post=post).delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        UserStats.objects.filter(user=self.author).delete()
+        for url in (
+            reverse('space_posts:profile',
+                    kwargs={'username': self.author}),
+            reverse('space_posts:post_detail', kwargs={'post_id': post.pk}),
+        ):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['number_posts'], 0)
+
+    def test_post_edit_keeps_comment_counter(self):
+        """Правка поста, загруженного до нового комментария, не
+        возвращает старое значение счетчика."""
+        post = Post.objects.create(author=self.author, text='Текст')
+        loaded = Post.objects.get(pk=post.pk)
+        Comment.objects.create(post=post, author=self.reader, text='Ок')
+        loaded.text = 'Еще правка'
+        loaded.save()
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Еще правка')
+        self.assertEqual(post.comments_count, 1)
+
+    def test_recount_fixes_drift(self):
+        """recount_counters исправляет счетчики, разошедшиеся с таблицами
+        (например, после bulk_create)."""
+        Post.objects.bulk_create([
+            Post(author=self.author, text=f'Текст {i}') for i in range(3)
+        ])
+        post = Post.objects.filter(author=self.author).first()
+        Follow.objects.bulk_create(
+            [Follow(user=self.reader, author=self.author)]
+        )
+        Comment.objects.bulk_create(
+            [Comment(post=post, author=self.reader, text='Текст')]
+        )
+        UserStats.objects.filter(user=self.reader).delete()
+        call_command('recount_counters', stdout=StringIO())
+        self.assertEqual(self.stats(self.author).posts_count, 3)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
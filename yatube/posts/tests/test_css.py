@@ -0,0 +1,39 @@
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from core.css import purge, split_selectors
+
+
+class PurgeCssTests(SimpleTestCase):
+    CSS = (
+        '@charset "UTF-8";/*! лицензия */'
+        ':root{--x:1}body{margin:0}.card{color:red}.unused{color:blue}'
+        '.btn:not(.disabled),.btn-unused{content:"}"}'
+        '@media (min-width:576px){.unused{top:0}.card{top:1px}}'
+        '@keyframes spin{to{transform:rotate(1turn)}}'
+        '.spinner{animation:spin 1s}'
+    )
+
+    def test_keeps_only_used_rules(self):
+        """Остаются теги, :root, используемые классы и лицензия; пустые
+        @media и анимации без ссылок на них удаляются."""
+        self.assertEqual(
+            purge(self.CSS, {'card', 'btn'}),
+            '@charset "UTF-8";/*! лицензия */'
+            ':root{--x:1}body{margin:0}.card{color:red}'
+            '.btn:not(.disabled){content:"}"}'
+            '@media (min-width:576px){.card{top:1px}}'
+        )
+
+    def test_keeps_referenced_keyframes(self):
+        self.assertIn('@keyframes spin', purge(self.CSS, {'spinner'}))
+
+    def test_split_selectors_ignores_commas_in_parentheses(self):
+        self.assertEqual(
+            split_selectors('.a:is(.b,.c),[data-x="1,2"]'),
+            ['.a:is(.b,.c)', '[data-x="1,2"]'],
+        )
+
+    def test_generated_files_are_up_to_date(self):
+        """site.css и встроенные стили пересобраны после правки
+        шаблонов (python manage.py purge_css)."""
+        call_command('purge_css', check=True)
@@ -0,0 +1,59 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import Max
+from django.test import TestCase, override_settings
+from ..dataset import generate
+from ..models import Comment, Follow, Post, TimelineEntry, User, UserStats
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+VOLUMES = {
+    'users': 50, 'groups': 3, 'posts': 300, 'comments': 400, 'follows': 200,
+}
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class GenerateDatasetTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_volumes_and_counters(self):
+        """Команда создает заданные объемы и пересчитывает счетчики
+        и ленты подписок."""
+        call_command(
+            'generate_dataset', *[
+                f'--{name}={value}' for name, value in VOLUMES.items()
+            ], '--image-share=0.2', stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), VOLUMES['users'])
+        self.assertEqual(Post.objects.count(), VOLUMES['posts'])
+        self.assertEqual(Comment.objects.count(), VOLUMES['comments'])
+        self.assertEqual(Follow.objects.count(), VOLUMES['follows'])
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+        top = UserStats.objects.aggregate(top=Max('followers_count'))['top']
+        # степенной закон: у самого популярного подписчиков много
+        # больше среднего
+        self.assertGreater(top, 3 * VOLUMES['follows'] / VOLUMES['users'])
+        post = Post.objects.order_by('-comments_count').first()
+        self.assertEqual(post.comments_count, post.comments.count())
+        self.assertGreater(
+            post.comments_count, 3 * VOLUMES['comments'] / VOLUMES['posts']
+        )
+
+    def test_same_seed_same_data(self):
+        """Один seed - одни и те же данные."""
+        def sample(seed):
+            # у паролей случайная соль
+            return [
+                obj for obj in generate(
+                    **VOLUMES, image_share=0, seed=seed
+                ) if obj['model'] != 'auth.user'
+            ]
+        self.assertEqual(sample(1), sample(1))
+        self.assertNotEqual(sample(1), sample(2))
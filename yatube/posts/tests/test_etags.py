@@ -0,0 +1,132 @@
+from unittest import mock
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Толстой')
+        cls.reader = User.objects.create_user(username='Читатель')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Текст', group=cls.group
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = {
+            'index': (reverse('space_posts:posts'), self.guest_client),
+            'group': (
+                reverse('space_posts:group_list', kwargs={'slug': 'group'}),
+                self.guest_client,
+            ),
+            'profile': (
+                reverse('space_posts:profile',
+                        kwargs={'username': self.author.username}),
+                self.guest_client,
+            ),
+            'detail': (self.post.get_absolute_url(), self.guest_client),
+            'follow': (
+                reverse('space_posts:follow_index'), self.reader_client
+            ),
+        }
+
+    def revalidate(self, client, url):
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_are_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304 без рендера."""
+        for name, (url, client) in self.urls.items():
+            with self.subTest(page=name):
+                response = self.revalidate(client, url)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_new_post_changes_etags(self):
+        """Новый пост меняет ETag всех лент, куда он попадает."""
+        etags = {
+            name: client.get(url)['ETag']
+            for name, (url, client) in self.urls.items()
+        }
+        Post.objects.create(author=self.author, text='Еще', group=self.group)
+        for name in ('index', 'group', 'profile', 'follow'):
+            url, client = self.urls[name]
+            with self.subTest(page=name):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_and_edit_change_post_etag(self):
+        """Комментарий и правка поста меняют его ETag."""
+        url, client = self.urls['detail']
+        etag = client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.reader, text='Ок')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_users_never_share_etag(self):
+        """У гостя и вошедшего пользователя разные ETag."""
+        for name in ('index', 'group', 'profile', 'detail'):
+            url, _ = self.urls[name]
+            with self.subTest(page=name):
+                self.assertNotEqual(
+                    self.guest_client.get(url)['ETag'],
+                    self.reader_client.get(url)['ETag'],
+                )
+
+    def test_follow_swap_changes_follow_etag(self):
+        """Подписка на другого автора вместо прежнего меняет ETag
+        ленты подписок, хотя число подписок осталось тем же."""
+        other = User.objects.create_user(username='Чехов')
+        Post.objects.create(author=other, text='Рассказ')
+        url, client = self.urls['follow']
+        etag = client.get(url)['ETag']
+        Follow.objects.create(user=self.reader, author=other)
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Рассказ')
+
+    # кэш целых страниц - отдельный слой со своим сроком жизни
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_db_changes_without_version_bump_change_etags(self):
+        """Правка старого поста и удаление поста меняют ETag лент, даже
+        если сдвиг версий не дошел до процесса (кэш в памяти другого
+        процесса)."""
+        newer = Post.objects.create(
+            author=self.author, text='Новее', group=self.group
+        )
+        names = ('index', 'group', 'profile', 'follow')
+        etags = {
+            name: self.urls[name][1].get(self.urls[name][0])['ETag']
+            for name in names
+        }
+        with mock.patch('posts.feeds.bump_version'):
+            self.post.text = 'Правка старого поста'
+            self.post.save()
+        for name in names:
+            url, client = self.urls[name]
+            with self.subTest(page=name, change='edit'):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, 200)
+                etags[name] = response['ETag']
+        with mock.patch('posts.feeds.bump_version'):
+            newer.delete()
+        for name in names:
+            url, client = self.urls[name]
+            with self.subTest(page=name, change='delete'):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, 200)
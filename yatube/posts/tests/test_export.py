@@ -0,0 +1,91 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User as AdminUser
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from ..export import parse_since
+from ..models import Comment, Follow, Post, User
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = AdminUser.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.author = User.objects.create_user(username='Толстой')
+        cls.old_post = Post.objects.create(author=cls.author, text='Старый')
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Новый')
+        Comment.objects.create(post=cls.post, author=cls.staff, text='Ок')
+        Follow.objects.create(user=cls.staff, author=cls.author)
+
+    def setUp(self):
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def export(self, table, **params):
+        response = self.staff_client.get(
+            reverse('space_posts:export', kwargs={'table': table}), params
+        )
+        return response, b''.join(response.streaming_content)
+
+    def test_jsonl_since(self):
+        """JSON Lines с отбором по дате публикации."""
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response, content = self.export('posts', since=since)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.post.pk])
+        self.assertEqual(rows[0]['text'], 'Новый')
+
+    def test_csv_gzip(self):
+        """CSV, сжатый на лету."""
+        response, content = self.export('comments', format='csv', gzip='1')
+        self.assertIn('comments.csv.gz', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(gzip.decompress(content).decode())))
+        self.assertEqual(rows[0], ['id', 'created', 'post', 'author', 'text'])
+        self.assertEqual(rows[1][-1], 'Ок')
+
+    def test_export_is_staff_only(self):
+        """Обычный пользователь выгрузку не получает."""
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(
+            reverse('space_posts:export', kwargs={'table': 'posts'})
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_command_writes_all_rows(self):
+        """Команда выгружает все подписки в файл."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'follows.jsonl.gz')
+            call_command('export_data', 'follows', gzip=True, output=path)
+            with gzip.open(path, 'rt') as file:
+                rows = [json.loads(line) for line in file]
+        self.assertEqual(
+            rows, [{'id': Follow.objects.get().pk,
+                    'user': self.staff.pk, 'author': self.author.pk}]
+        )
+
+    def test_parse_since_is_aware(self):
+        """Дата без часового пояса понимается во времени TIME_ZONE."""
+        for value in ('2020-01-02', '2020-01-02T03:04:05'):
+            with self.subTest(value=value):
+                since = parse_since(value)
+                self.assertTrue(timezone.is_aware(since))
+                self.assertEqual(
+                    timezone.localtime(since).date().isoformat(),
+                    '2020-01-02',
+                )
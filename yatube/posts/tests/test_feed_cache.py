@@ -0,0 +1,148 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from core.cache import cache_from_url, get_or_build
+from ..models import Follow, Group, Post, User
+
+
+class GetOrBuildTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def build(self):
+        self.calls += 1
+        return self.calls
+
+    def test_builds_once(self):
+        """Значение строится один раз и потом читается из кэша."""
+        self.assertEqual(get_or_build('key', self.build, 60), 1)
+        self.assertEqual(get_or_build('key', self.build, 60), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_expired_value_is_rebuilt(self):
+        """Истекший логический срок ведет к пересчету."""
+        cache.set('key', ('old', 0.1, time.time() - 1), 60)
+        self.assertEqual(get_or_build('key', self.build, 60), 1)
+
+    def test_stale_value_served_while_locked(self):
+        """Пока другой процесс пересчитывает значение, отдается старое."""
+        cache.set('key', ('old', 0.1, time.time() - 1), 60)
+        cache.add('lock:key', 1, 10)
+        self.assertEqual(get_or_build('key', self.build, 60), 'old')
+        self.assertEqual(self.calls, 0)
+
+    def test_waiter_builds_after_failed_holder(self):
+        """Если строивший процесс упал и снял блокировку, ждущий сразу
+        берет ее сам и строит значение, не дожидаясь LOCK_TIMEOUT."""
+        cache.add('lock:key', 1, 10)
+        with mock.patch('core.cache.time.sleep',
+                        side_effect=lambda _: cache.delete('lock:key')):
+            self.assertEqual(get_or_build('key', self.build, 60), 1)
+        self.assertIsNone(cache.get('lock:key'))
+
+    def test_waiter_keeps_foreign_lock(self):
+        """Не дождавшийся процесс строит сам, но чужую блокировку
+        не снимает."""
+        cache.add('lock:key', 'other', 10)
+        with mock.patch('core.cache.LOCK_TIMEOUT', 0):
+            self.assertEqual(get_or_build('key', self.build, 60), 1)
+        self.assertEqual(cache.get('lock:key'), 'other')
+
+    def test_expired_lock_taken_by_other_is_kept(self):
+        """Если построение пережило свою блокировку и ее взял другой
+        процесс, чужая блокировка не снимается."""
+        def build():
+            cache.set('lock:key', 'other', 10)
+            return 1
+        self.assertEqual(get_or_build('key', build, 60), 1)
+        self.assertEqual(cache.get('lock:key'), 'other')
+
+    def test_cache_from_url(self):
+        """Настройки кэша читаются из URL."""
+        self.assertEqual(
+            cache_from_url('file:///var/tmp/yatube'),
+            {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': '/var/tmp/yatube',
+            }
+        )
+        with self.assertRaises(ValueError):
+            cache_from_url('ftp://host')
+
+
+# кэш целых страниц (posts/middleware.py) закрыл бы проверяемый кэш лент
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class FeedPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Толстой')
+        cls.group = Group.objects.create(
+            title='Группа-1', slug='test-slug-1', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Текст поста'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def texts(self, url):
+        response = self.guest_client.get(url)
+        return [post.text for post in response.context['page_obj']]
+
+    def test_feed_pages_cached_until_post_changes(self):
+        """Номерные страницы лент берутся из кэша, пока пост
+        не сохранен или не создан новый."""
+        urls = (
+            reverse('space_posts:posts'),
+            reverse('space_posts:group_list', kwargs={'slug': 'test-slug-1'}),
+            reverse('space_posts:profile', kwargs={'username': 'Толстой'}),
+        )
+        for url in urls:
+            self.texts(url)
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.texts(url), ['Текст поста'])
+        Post.objects.create(author=self.user, group=self.group, text='Новый')
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.texts(url), ['Новый', 'Тихая правка'])
+
+    def test_moved_post_leaves_old_group(self):
+        """Пост, перенесенный в другую группу, пропадает из старой."""
+        url = reverse('space_posts:group_list', kwargs={'slug': 'test-slug-1'})
+        self.assertEqual(self.texts(url), ['Текст поста'])
+        self.post.group = Group.objects.create(
+            title='Группа-2', slug='test-slug-2', description='Описание'
+        )
+        self.post.save()
+        self.assertEqual(self.texts(url), [])
+
+    def test_follow_feed_cached_until_follows_change(self):
+        """Лента подписок берется из кэша до новой подписки или поста."""
+        reader = User.objects.create_user(username='Читатель')
+        other = User.objects.create_user(username='Чехов')
+        Post.objects.create(author=other, text='Рассказ')
+        Follow.objects.create(user=reader, author=self.user)
+        client = Client()
+        client.force_login(reader)
+        url = reverse('space_posts:follow_index')
+
+        def texts():
+            response = client.get(url)
+            with self.assertNumQueries(0):
+                response.context['page_obj'].paginator.count
+            return [post.text for post in response.context['page_obj']]
+        self.assertEqual(texts(), ['Текст поста'])
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        self.assertEqual(texts(), ['Текст поста'])
+        Follow.objects.create(user=reader, author=other)
+        self.assertEqual(texts(), ['Рассказ', 'Тихая правка'])
@@ -10,7 +10,8 @@ import tempfile
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+# страницы из кэша (posts/middleware.py) не дают response.context
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PAGE_CACHE_TIMEOUT=0)
 class PostCreateUpdateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -262,13 +263,21 @@ class PostCreateUpdateFormTests(TestCase):
         self.assertNotIn(new_comment, list_comment)
 
     def test_cashe_index(self):
-        """Проверка работы кэша на главной странице - контент не должен
-        измениться после удаления поста из БД"""
+        """Карточки постов на главной берутся из кэша, пока пост не
+        сохранен заново; удаленный пост сразу пропадает со страницы."""
         response = self.authorized_client.get(reverse('space_posts:posts'))
-        cashe_content = response.content
-        Post.objects.latest('pub_date').delete()
+        post = Post.objects.latest('pub_date')
+        # update() не меняет updated - карточка остается в кэше
+        Post.objects.filter(pk=post.pk).update(text='Тихая правка')
+        response = self.authorized_client.get(reverse('space_posts:posts'))
+        self.assertNotContains(response, 'Тихая правка')
+        post.refresh_from_db()
+        post.save()
+        response = self.authorized_client.get(reverse('space_posts:posts'))
+        self.assertContains(response, 'Тихая правка')
+        post.delete()
         response = self.authorized_client.get(reverse('space_posts:posts'))
-        self.assertEqual(cashe_content, response.content)
+        self.assertNotContains(response, 'Тихая правка')
 
     def test_follow_create(self):
         """Авторизованный пользователь может однократно подписываться на
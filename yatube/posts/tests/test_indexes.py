@@ -0,0 +1,40 @@
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from ..management.commands.explain_feeds import feed_queries
+from ..models import Comment, Follow, Group, Post, User
+
+
+class FeedIndexesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Толстой')
+        cls.reader = User.objects.create_user(username='Читатель')
+        cls.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Текст'
+        )
+        Comment.objects.create(post=cls.post, author=cls.user, text='Текст')
+
+    @skipUnless(connection.vendor == 'sqlite', 'план запроса SQLite')
+    def test_feeds_use_indexes_for_ordering(self):
+        """Ленты и комментарии читаются по индексу без сортировки."""
+        queries = feed_queries()
+        self.assertEqual(
+            set(queries), {'index', 'profile', 'group', 'comments'}
+        )
+        for name, queryset in queries.items():
+            with self.subTest(name=name):
+                plan = queryset.explain()
+                self.assertIn('USING INDEX', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_follow_is_unique(self):
+        """Повторная подписка на того же автора невозможна."""
+        Follow.objects.create(user=self.reader, author=self.user)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.user)
@@ -0,0 +1,91 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from sorl.thumbnail.models import KVStore
+from ..loader import iter_array
+from ..models import Comment, Follow, Post, TimelineEntry, User
+
+PUB_DATE = '2020-01-02T03:04:05Z'
+FIXTURE = [
+    {'model': 'thumbnail.kvstore', 'pk': 'key', 'fields': {'value': '{}'}},
+    # подписка раньше пользователей: ссылки по natural key
+    {'model': 'posts.follow', 'pk': 1,
+     'fields': {'user': ['reader'], 'author': ['author']}},
+    {'model': 'posts.post', 'pk': 10,
+     'fields': {'text': 'Пост', 'pub_date': PUB_DATE, 'author': 1}},
+    {'model': 'posts.comment', 'pk': 5,
+     'fields': {'post': 10, 'author': 2, 'text': 'Ок',
+                'created': PUB_DATE}},
+    {'model': 'auth.user', 'pk': 1,
+     'fields': {'username': 'author', 'password': ''}},
+    {'model': 'auth.user', 'pk': 2,
+     'fields': {'username': 'reader', 'password': ''}},
+]
+
+
+class LoaderTests(TestCase):
+    def load(self, name, content, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, name)
+            mode = 'wt' if name.endswith('.gz') else 'w'
+            opener = gzip.open if name.endswith('.gz') else open
+            with opener(path, mode, encoding='utf-8') as file:
+                file.write(content)
+            out = StringIO()
+            call_command('load_data', path, stdout=out, **options)
+        return out.getvalue()
+
+    def check_loaded(self):
+        post = Post.objects.get(pk=10)
+        self.assertEqual(
+            post.pub_date.isoformat(), '2020-01-02T03:04:05+00:00'
+        )
+        self.assertEqual(post.comments_count, 1)
+        author = User.objects.get(username='author')
+        self.assertEqual(author.stats.posts_count, 1)
+        self.assertEqual(author.stats.followers_count, 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user__username='reader', post=post).exists())
+
+    def test_fixture_array(self):
+        """Фикстура-массив загружается с сохранением дат, счетчики и
+        ленты пересчитываются, служебные таблицы пропускаются."""
+        output = self.load(
+            'db.json', json.dumps(FIXTURE), skip_noise=True, batch_size=2
+        )
+        self.check_loaded()
+        self.assertFalse(KVStore.objects.exists())
+        self.assertIn('строк/с', output)
+
+    def test_gzipped_json_lines(self):
+        """JSON Lines, сжатые gzip."""
+        content = '\n'.join(json.dumps(obj) for obj in FIXTURE)
+        self.load('db.jsonl.gz', content, exclude=['thumbnail'])
+        self.check_loaded()
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_posts_only_fill_existing_timelines(self):
+        """Посты, загруженные без подписок, попадают в ленты уже
+        подписанных читателей."""
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        post = {'model': 'posts.post', 'pk': 10,
+                'fields': {'text': 'Пост', 'pub_date': PUB_DATE,
+                           'author': author.pk}}
+        self.load('posts.json', json.dumps([post]))
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=reader, post_id=10).exists())
+
+    def test_iter_array_reads_in_pieces(self):
+        """Массив читается кусками меньше одного объекта."""
+        objects = [{'text': 'x' * 50, 'n': i} for i in range(20)]
+        file = io.StringIO(' [ ' + json.dumps(objects)[1:])
+        self.assertEqual(list(iter_array(file, read_size=7)), objects)
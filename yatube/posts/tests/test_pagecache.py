@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from ..models import Comment, Follow, Post, User
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Толстой')
+        cls.reader = User.objects.create_user(username='Читатель')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+        cls.profile_url = reverse(
+            'space_posts:profile', kwargs={'username': cls.author.username}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_guest_page_served_from_cache(self):
+        """Повторный запрос гостя отдается из кэша без запросов к БД
+        с заголовками для прокси."""
+        url = reverse('space_posts:posts')
+        first = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertIn('public', second['Cache-Control'])
+        self.assertIn('s-maxage', second['Cache-Control'])
+        self.assertIn('Cookie', second['Vary'])
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_guest_page_changes_with_data(self):
+        """Новый пост и новый комментарий сразу видны гостю."""
+        url = reverse('space_posts:posts')
+        self.guest_client.get(url)
+        Post.objects.create(author=self.author, text='Свежий пост')
+        self.assertContains(self.guest_client.get(url), 'Свежий пост')
+        url = self.post.get_absolute_url()
+        self.guest_client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Свежий комментарий'
+        )
+        self.assertContains(self.guest_client.get(url), 'Свежий комментарий')
+
+    def test_shell_renders_only_holes(self):
+        """Каркас страницы общий, а шапка и кнопка подписки рисуются
+        для каждого пользователя."""
+        self.author_client.get(self.profile_url)
+        response = self.reader_client.get(self.profile_url)
+        self.assertTemplateNotUsed(response, 'posts/profile.html')
+        self.assertTemplateUsed(response, 'includes/follow_button.html')
+        self.assertContains(response, 'Пользователь: Читатель')
+        self.assertContains(response, 'Подписаться')
+        self.assertNotContains(response, '<!--hole')
+        self.assertIn('private', response['Cache-Control'])
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(self.profile_url)
+        self.assertContains(response, 'Отписаться')
+        self.assertContains(response, 'Подписчиков: 1')
+
+    def test_shell_hit_keeps_security_headers(self):
+        """Страница из каркаса запрещает встраивание так же, как
+        отрисованная."""
+        first = self.author_client.get(self.profile_url)
+        second = self.reader_client.get(self.profile_url)
+        self.assertTemplateNotUsed(second, 'posts/profile.html')
+        self.assertEqual(second['X-Frame-Options'], first['X-Frame-Options'])
+
+    def test_shell_hole_has_own_csrf_token(self):
+        """Форма комментария из каркаса получает свой csrf-токен,
+        ссылка на правку видна только автору."""
+        url = self.post.get_absolute_url()
+        self.author_client.get(url)
+        response = self.reader_client.get(url)
+        self.assertTemplateNotUsed(response, 'posts/post_detail.html')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertNotContains(response, 'редактировать пост')
+        self.assertContains(self.author_client.get(url), 'редактировать пост')
@@ -0,0 +1,117 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from ..models import Post, User
+from ..paginators import NUMBERED_PAGES, WINDOW, decode_cursor
+from ..views import N_EXEMPLE
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class FeedPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # постов больше, чем помещается на номерные страницы
+        cls.N_POSTS_ALL: int = N_EXEMPLE * (NUMBERED_PAGES + 2) + 3
+        cls.user = User.objects.create_user(username='Толстой')
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Текст поста {i}')
+            for i in range(cls.N_POSTS_ALL)
+        ])
+        cls.control_list = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True)
+        )
+
+    def setUp(self):
+        # посты созданы bulk_create без сигналов, сбрасывающих кэш лент
+        cache.clear()
+        self.guest_client = Client()
+        self.url = reverse('space_posts:posts')
+
+    def walk(self, query, attr):
+        """Листает ленту по ссылкам next_query/previous_query."""
+        pages = []
+        while True:
+            response = self.guest_client.get(f'{self.url}?{query}')
+            page_obj = response.context['page_obj']
+            pages.append([post.pk for post in page_obj])
+            if attr == 'next' and not page_obj.has_next():
+                return pages
+            if attr == 'previous' and not page_obj.has_previous():
+                return pages
+            query = getattr(page_obj, f'{attr}_query')
+
+    def test_walk_forward_covers_feed_once(self):
+        """Проход вперед выдает все посты ленты по одному разу по порядку."""
+        pages = self.walk('page=1', 'next')
+        walked = [pk for page in pages for pk in page]
+        self.assertEqual(walked, self.control_list)
+        self.assertTrue(all(len(page) == N_EXEMPLE for page in pages[:-1]))
+
+    def test_walk_backward_from_last_page(self):
+        """С последней страницы можно вернуться назад к началу ленты,
+        не увидев ни одного поста дважды."""
+        response = self.guest_client.get(self.url + '?page=1')
+        last_query = response.context['page_obj'].paginator.last_query
+        pages = self.walk(last_query, 'previous')
+        self.assertEqual(pages[0], self.control_list[-N_EXEMPLE:])
+        # каждый пост ровно один раз и по порядку, без повторов у начала
+        walked = [pk for page in reversed(pages) for pk in page]
+        self.assertEqual(walked, self.control_list)
+
+    def test_deep_pages_use_cursor(self):
+        """После номерных страниц ссылка ведет на курсор, а номер
+        страницы вне диапазона сводится к последней номерной."""
+        response = self.guest_client.get(
+            f'{self.url}?page={NUMBERED_PAGES}'
+        )
+        page_obj = response.context['page_obj']
+        self.assertTrue(page_obj.next_query.startswith('cursor='))
+        response = self.guest_client.get(self.url + '?page=100000')
+        self.assertEqual(response.context['page_obj'].number, NUMBERED_PAGES)
+        response = self.guest_client.get(
+            f'{self.url}?{page_obj.next_query}'
+        )
+        page_obj = response.context['page_obj']
+        self.assertIsNone(page_obj.number)
+        self.assertIsNotNone(decode_cursor(page_obj.cursor))
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Испорченный курсор отдает первую страницу."""
+        response = self.guest_client.get(self.url + '?cursor=abc%%%')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            self.control_list[:N_EXEMPLE]
+        )
+
+    def test_page_window_is_elided(self):
+        """Ссылки только на первую, последнюю номерную и соседние
+        с текущей страницы, между ними - пропуск."""
+        middle = NUMBERED_PAGES // 2 + 1
+        response = self.guest_client.get(f'{self.url}?page={middle}')
+        self.assertEqual(
+            response.context['page_obj'].window,
+            [1, None, *range(middle - WINDOW, middle + WINDOW + 1), None,
+             NUMBERED_PAGES],
+        )
+        response = self.guest_client.get(f'{self.url}?page=1')
+        window = response.context['page_obj'].window
+        self.assertEqual(window[:WINDOW + 1], list(range(1, WINDOW + 2)))
+        self.assertEqual(window[-2:], [None, NUMBERED_PAGES])
+
+    def test_count_is_cached_per_feed_version(self):
+        """Число записей считается один раз до изменения ленты."""
+        self.guest_client.get(self.url)
+        response = self.guest_client.get(self.url)
+        self.assertEqual(
+            response.context['page_obj'].paginator.count, self.N_POSTS_ALL)
+        self.assertContains(response, f'Записей: {self.N_POSTS_ALL}')
+        with self.assertNumQueries(0):
+            response.context['page_obj'].paginator.count
+        Post.objects.create(author=self.user, text='Новый пост')
+        response = self.guest_client.get(self.url)
+        self.assertEqual(
+            response.context['page_obj'].paginator.count,
+            self.N_POSTS_ALL + 1)
@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import tempfile
+
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (RequestFactory, TestCase, TransactionTestCase,
+                         override_settings)
+from core.db import (PIN_COOKIE, ReplicaRouter, primary_reads,
+                     replica_reads, routing, sync_replicas)
+from core.middleware import ReadYourWritesMiddleware
+from ..models import Post
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.databases = []
+
+    def view(self, write=False, primary=False):
+        @replica_reads
+        def view(request):
+            if primary:
+                with primary_reads():
+                    self.databases.append(self.router.db_for_read(Post))
+            self.databases.append(self.router.db_for_read(Post))
+            if write:
+                self.router.db_for_write(Post)
+            return HttpResponse()
+        return view
+
+    def test_reads_go_to_replica_only_in_marked_views(self):
+        """С реплики читают только помеченные views."""
+        middleware = ReadYourWritesMiddleware(self.view())
+        middleware(self.factory.get('/'))
+        self.assertEqual(self.databases, ['replica1'])
+        self.assertIsNone(self.router.db_for_read(Post))
+        self.assertIsNone(routing.get())
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_cache_builds_read_from_primary(self):
+        """Внутри primary_reads (построение записей кэша) чтение идет
+        с основной базы, после блока - снова с реплики."""
+        ReadYourWritesMiddleware(self.view(primary=True))(
+            self.factory.get('/')
+        )
+        self.assertEqual(self.databases, [None, 'replica1'])
+
+    def test_write_pins_reader_to_primary(self):
+        """После записи пользователь какое-то время читает с основной
+        базы."""
+        response = ReadYourWritesMiddleware(self.view(write=True))(
+            self.factory.post('/')
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        response = ReadYourWritesMiddleware(self.view())(request)
+        self.assertEqual(self.databases, ['replica1', None])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class SyncReplicasTests(TransactionTestCase):
+    # backup копирует базу вне транзакции, поэтому не TestCase
+    def test_sync_replicas_copies_primary(self):
+        """Заменитель репликации копирует основную базу в файл реплики."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'replica.sqlite3')
+            replica = dict(connections['default'].settings_dict, NAME=path)
+            connections.databases['replica1'] = replica
+            try:
+                sync_replicas()
+            finally:
+                connections['replica1'].close()
+                del connections.databases['replica1']
+                del connections['replica1']
+            with sqlite3.connect(path) as copy:
+                tables = {row[0] for row in copy.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )}
+            self.assertIn(Post._meta.db_table, tables)
@@ -0,0 +1,97 @@
+from io import StringIO
+
+from django.contrib.auth.models import User as AdminUser
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from ..models import Post, User
+from .. import search
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Толстой')
+        cls.war = Post.objects.create(
+            author=cls.user, text='Война и мир, война и мир'
+        )
+        cls.peace = Post.objects.create(
+            author=cls.user, text='Мир, труд, май'
+        )
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Мирный пост номер {i}')
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.url = reverse('space_posts:search')
+
+    def find(self, query, cursor=None):
+        data = {'q': query}
+        if cursor:
+            data['cursor'] = cursor
+        response = self.guest_client.get(self.url, data)
+        return response.context['posts'], response.context['next_cursor']
+
+    def test_search_is_ranked_and_highlighted(self):
+        """Лучшее совпадение идет первым, слова подсвечены."""
+        posts, _ = self.find('война')
+        self.assertEqual(posts, [self.war])
+        self.assertIn('<mark>Война</mark>', posts[0].snippet)
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется триггерами при изменении и удалении."""
+        self.peace.text = 'Весна'
+        self.peace.save()
+        self.assertEqual(self.find('весна')[0], [self.peace])
+        self.assertNotIn(self.peace, self.find('труд')[0])
+        self.peace.delete()
+        self.assertEqual(self.find('весна')[0], [])
+
+    def test_cursor_pagination_covers_all_results(self):
+        """Курсор листает все найденные посты по одному разу."""
+        found, cursor = [], None
+        while True:
+            posts, cursor = search.search('мир', 2, cursor)
+            found += posts
+            if cursor is None:
+                break
+        self.assertEqual(len(found), 7)
+        self.assertEqual(len(set(found)), 7)
+
+    def test_user_input_is_escaped(self):
+        """Синтаксис FTS5 и HTML из запроса и текста не выполняются."""
+        post = Post.objects.create(
+            author=self.user, text='<script>alert("мир")</script>'
+        )
+        posts, _ = self.find('alert" мир*')
+        self.assertEqual(posts, [post])
+        self.assertNotIn('<script>', posts[0].snippet)
+
+    def test_rebuild_command_restores_index(self):
+        """Команда перестраивает индекс после ручной чистки."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {search.FTS_TABLE}({search.FTS_TABLE}) "
+                "VALUES('delete-all')"
+            )
+        self.assertEqual(self.find('война')[0], [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.find('война')[0], [self.war])
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты по индексу."""
+        admin = AdminUser.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'война'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.war]
+        )
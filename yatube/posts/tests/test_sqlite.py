@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase
+
+
+class SQLitePragmaTests(SimpleTestCase):
+    def test_new_connection_gets_pragmas(self):
+        """Новое соединение SQLite включает WAL и ждет блокировку."""
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = DatabaseWrapper(dict(
+                connections['default'].settings_dict,
+                NAME=os.path.join(directory, 'db.sqlite3'),
+            ))
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(
+                        cursor.fetchone()[0],
+                        settings.SQLITE_PRAGMAS['busy_timeout'],
+                    )
+            finally:
+                wrapper.close()
@@ -0,0 +1,90 @@
+import gzip
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from core.static import accepted_encodings
+
+
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings = override_settings(
+            STATIC_ROOT=cls.static_root, PAGE_CACHE_TIMEOUT=0,
+            SERVE_STATIC=True,
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def stylesheet_url(self):
+        response = self.guest_client.get(reverse('space_posts:posts'))
+        content = response.content.decode()
+        start = content.index('/static/css/site.')
+        return content[start:content.index('"', start)]
+
+    def test_page_links_hashed_names(self):
+        """Страницы ссылаются на файлы с хэшем содержимого в имени."""
+        self.assertRegex(
+            self.stylesheet_url(),
+            r'^/static/css/site\.[0-9a-f]{12}\.css$'
+        )
+
+    def test_hashed_file_is_immutable_and_compressed(self):
+        """Файл с хэшем отдается сжатым и кэшируется навсегда."""
+        url = self.stylesheet_url()
+        response = self.guest_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        plain = self.guest_client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(plain.streaming_content), body)
+
+    def test_original_name_is_revalidated(self):
+        """Файл по исходному имени проверяется по Last-Modified."""
+        url = '/static/css/site.css'
+        response = self.guest_client.get(url)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_and_outside_files_are_not_served(self):
+        """Файлы вне STATIC_ROOT и отсутствующие не раздаются."""
+        for url in ('/static/../manage.py', '/static/css/missing.css'):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            accepted_encodings('gzip, deflate, br;q=0'), {'gzip', 'deflate'})
+        self.assertEqual(accepted_encodings(''), set())
+
+    def test_missing_manifest_entry_fails_in_production(self):
+        """Файл без записи в манифесте - ошибка в рабочем режиме и
+        исходное имя в разработке."""
+        name = 'css/missing.css'
+        with override_settings(STATIC_MANIFEST_STRICT=True):
+            with self.assertRaises(ValueError):
+                staticfiles_storage.stored_name(name)
+        with override_settings(STATIC_MANIFEST_STRICT=False):
+            self.assertEqual(staticfiles_storage.stored_name(name), name)
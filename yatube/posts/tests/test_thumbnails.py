@@ -0,0 +1,208 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default, get_thumbnail
+from ..models import Post, Rendition, User
+from .. import thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class SyncExecutor:
+    def submit(self, func, *args):
+        func(*args)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    @mock.patch.object(thumbnails, '_get_executor', SyncExecutor)
+    @mock.patch.object(
+        thumbnails.transaction, 'on_commit', lambda func: func()
+    )
+    def test_post_create_pregenerates_thumbnails(self):
+        """После создания поста с картинкой все варианты миниатюр
+        уже лежат в key-value store, а их вес записан."""
+        uploaded = SimpleUploadedFile(
+            name='small.gif', content=SMALL_GIF, content_type='image/gif'
+        )
+        self.authorized_client.post(
+            reverse('space_posts:post_create'),
+            data={'text': 'Текст', 'image': uploaded},
+        )
+        post = Post.objects.latest('pub_date')
+        with mock.patch.object(
+            default.engine, 'get_image', side_effect=AssertionError
+        ):
+            for geometry, image_format in thumbnails.renditions():
+                with self.subTest(geometry=geometry, format=image_format):
+                    thumbnail = get_thumbnail(
+                        post.image, geometry,
+                        **thumbnails.options(image_format)
+                    )
+                    self.assertTrue(thumbnail.exists())
+                    rendition = Rendition.objects.get(
+                        post=post, geometry=geometry, format=image_format
+                    )
+                    self.assertEqual(
+                        rendition.size,
+                        thumbnail.storage.size(thumbnail.name)
+                    )
+                    self.assertEqual(rendition.source_size, len(SMALL_GIF))
+
+    def test_schedule_skips_posts_without_image(self):
+        """Посты без картинки в очередь не попадают."""
+        post = Post.objects.create(author=self.user, text='Текст')
+        with mock.patch.object(thumbnails.transaction, 'on_commit') as hook:
+            thumbnails.schedule(post)
+        hook.assert_not_called()
+
+    def test_attach_thumbnails_reads_page_in_one_query(self):
+        """Миниатюры страницы берутся из key-value store одним запросом
+        к БД и совпадают с тем, что вернул бы sorl."""
+        posts = [
+            Post.objects.create(
+                author=self.user, text=f'Текст {i}',
+                image=SimpleUploadedFile(
+                    name=f'page{i}.gif', content=SMALL_GIF,
+                    content_type='image/gif'
+                ),
+            )
+            for i in range(3)
+        ]
+        geometry = settings.POST_THUMBNAIL_SIZES[0]
+        fallback = settings.POST_IMAGE_FORMATS[-1]
+        expected = {
+            post.pk: get_thumbnail(
+                post.image, geometry, **thumbnails.options(fallback)
+            ).name
+            for post in posts
+        }
+        posts.append(Post.objects.create(author=self.user, text='Текст'))
+        default.kvstore.cache.clear()
+        with self.assertNumQueries(1):
+            thumbnails.attach_thumbnails(posts)
+        for post in posts[:-1]:
+            self.assertEqual(post.thumbnail.name, expected[post.pk])
+        self.assertIsNone(posts[-1].thumbnail)
+        # теперь все ключи в кэше
+        with self.assertNumQueries(0):
+            thumbnails.attach_thumbnails(posts)
+
+    @mock.patch.object(thumbnails, '_get_executor', SyncExecutor)
+    @mock.patch.object(
+        thumbnails.transaction, 'on_commit', lambda func: func()
+    )
+    def test_post_image_renders_srcset_per_format(self):
+        """Картинка поста выводится через <picture> со srcset всех
+        размеров в каждом формате."""
+        uploaded = SimpleUploadedFile(
+            name='srcset.gif', content=SMALL_GIF, content_type='image/gif'
+        )
+        self.authorized_client.post(
+            reverse('space_posts:post_create'),
+            data={'text': 'Текст', 'image': uploaded},
+        )
+        post = Post.objects.latest('pub_date')
+        response = self.authorized_client.get(post.get_absolute_url())
+        content = response.content.decode()
+        self.assertIn('<source type="image/webp"', content)
+        for geometry, image_format in thumbnails.renditions():
+            with self.subTest(geometry=geometry, format=image_format):
+                thumbnail = get_thumbnail(
+                    post.image, geometry, **thumbnails.options(image_format)
+                )
+                self.assertIn(
+                    f'{thumbnail.url} {thumbnails.width(geometry)}w', content
+                )
+
+    def test_upload_stores_image_preview(self):
+        """При загрузке картинки в посте сохраняются ее размеры,
+        основной цвет и превью."""
+        post = Post.objects.create(
+            author=self.user, text='Текст',
+            image=SimpleUploadedFile(
+                name='preview.gif', content=SMALL_GIF,
+                content_type='image/gif'
+            ),
+        )
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertRegex(post.image_color, r'^#[0-9a-f]{6}$')
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,')
+        )
+
+    def test_feed_shows_placeholder_without_touching_files(self):
+        """Пока миниатюр нет, лента выводит превью из полей поста,
+        не создавая миниатюр на лету, и грузит картинки лениво."""
+        post = Post.objects.create(
+            author=self.user, text='Текст',
+            image=SimpleUploadedFile(
+                name='lazy.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        with mock.patch.object(
+            thumbnails, 'get_thumbnail', side_effect=AssertionError
+        ):
+            response = self.authorized_client.get(
+                reverse('space_posts:posts')
+            )
+        content = response.content.decode()
+        self.assertIn(f'src="{post.image_placeholder}"', content)
+        self.assertIn('loading="lazy" decoding="async"', content)
+        self.assertIn('width="900" height="450"', content)
+
+    def test_feed_never_creates_thumbnails_without_placeholder(self):
+        """Пост без превью (загружен без сигналов) в ленте выводится по
+        ссылке на исходный файл, без создания миниатюры на лету."""
+        post = Post.objects.create(
+            author=self.user, text='Текст',
+            image=SimpleUploadedFile(
+                name='raw.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        Post.objects.filter(pk=post.pk).update(
+            image_placeholder='', image_color=''
+        )
+        with mock.patch.object(
+            thumbnails, 'get_thumbnail', side_effect=AssertionError
+        ):
+            response = self.authorized_client.get(
+                reverse('space_posts:posts')
+            )
+        self.assertContains(response, f'src="{post.image.url}"')
+
+    @override_settings(POST_THUMBNAIL_OPTIONS={'upscale': True})
+    def test_rendered_size_follows_source_proportions(self):
+        """Без обрезки размеры <img> берутся из пропорций исходника."""
+        post = Post(image='posts/tall.gif', image_width=100, image_height=400)
+        self.assertEqual(thumbnails.rendered_size(post, '900x450'), (112, 450))
+        post.image_width, post.image_height = 1800, 450
+        self.assertEqual(thumbnails.rendered_size(post, '900x450'), (900, 225))
@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from .. import timeline
+from ..models import Follow, Post, TimelineEntry, User, UserStats
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Толстой')
+        cls.reader = User.objects.create_user(username='Читатель')
+        cls.other = User.objects.create_user(username='Другой')
+        cls.old_post = Post.objects.create(author=cls.author, text='Старый')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow(self, client, author):
+        client.get(reverse(
+            'space_posts:profile_follow', kwargs={'username': author}
+        ))
+
+    def feed(self, client):
+        response = client.get(reverse('space_posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка заполняет ленту старыми постами, отписка чистит ее."""
+        self.follow(self.reader_client, self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=self.old_post).exists())
+        self.assertIn(self.old_post, self.feed(self.reader_client))
+        self.reader_client.get(reverse(
+            'space_posts:profile_unfollow', kwargs={'username': self.author}
+        ))
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+        self.assertNotIn(self.old_post, self.feed(self.reader_client))
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост записывается в ленты подписчиков автора."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый')
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.other, post=post).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_is_pulled_on_read(self):
+        """Посты автора с большим числом подписчиков не рассылаются,
+        а подмешиваются в ленту при чтении."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый')
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=post).exists()
+        )
+        self.assertIn(post, self.feed(self.reader_client))
+        other_client = Client()
+        other_client.force_login(self.other)
+        self.assertIn(post, self.feed(other_client))
+
+    @override_settings(
+        TIMELINE_FANOUT_LIMIT=2, TIMELINE_PUSH_LIMIT=2, TIMELINE_WORKERS=0
+    )
+    @mock.patch.object(
+        timeline.transaction, 'on_commit', lambda func: func()
+    )
+    def test_pulled_posts_survive_dropping_under_limit(self):
+        """Автор снова рассылает посты, только когда подписчиков стало
+        меньше TIMELINE_PUSH_LIMIT; посты, написанные без рассылки,
+        при этом переносятся в ленты и не пропадают."""
+        third = User.objects.create_user(username='Третий')
+        for user in (self.reader, self.other, third):
+            Follow.objects.create(user=user, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый')
+        Follow.objects.filter(user=self.other).delete()
+        self.assertTrue(UserStats.objects.get(user=self.author).pulled)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertIn(post, self.feed(self.reader_client))
+        Follow.objects.filter(user=third).delete()
+        self.assertFalse(UserStats.objects.get(user=self.author).pulled)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertIn(post, self.feed(self.reader_client))
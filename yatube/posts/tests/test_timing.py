@@ -0,0 +1,50 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from ..models import Post, User
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Толстой')
+        Post.objects.create(author=cls.user, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_header_and_log_line(self):
+        """Выбранный запрос получает Server-Timing и строку в логе."""
+        with self.assertLogs('yatube.timing', 'INFO') as logs:
+            response = self.guest_client.get(reverse('space_posts:posts'))
+        metrics = response['Server-Timing']
+        self.assertTrue(metrics.startswith('total;dur='))
+        self.assertIn('sql;dur=', metrics)
+        self.assertIn('template;dur=', metrics)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'space_posts:posts')
+        self.assertEqual(line['status'], 200)
+        self.assertGreater(line['sql_count'], 0)
+        self.assertGreater(line['cache_miss_count'], 0)
+
+    def test_cached_page_counts_cache_hits(self):
+        """Страница из кэша: без SQL, с попаданиями в кэш."""
+        url = reverse('space_posts:posts')
+        self.guest_client.get(url)
+        with self.assertLogs('yatube.timing', 'INFO') as logs:
+            response = self.guest_client.get(url)
+        self.assertNotIn('sql;', response['Server-Timing'])
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'space_posts:posts')
+        self.assertGreater(line['cache_hit_count'], 0)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        """Невыбранный запрос идет без замеров."""
+        response = self.guest_client.get(reverse('space_posts:posts'))
+        self.assertFalse(response.has_header('Server-Timing'))
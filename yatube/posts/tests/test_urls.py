@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from ..models import Group, Post, User
 from http import HTTPStatus
 
@@ -6,6 +6,8 @@ from http import HTTPStatus
 N_EXEMPLE: int = 10
 
 
+# страницы из кэша (posts/middleware.py) не рендерят шаблоны
+@override_settings(PAGE_CACHE_TIMEOUT=0)
 class URLTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 from ..models import Group, Post, User
@@ -44,6 +45,8 @@ class PostPagesTests(TestCase):
         cls.N_POSTS_PROFILE = Post.objects.filter(author=cls.user1).count()
 
     def setUp(self):
+        # посты созданы bulk_create без сигналов, сбрасывающих кэш лент
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user1)
 
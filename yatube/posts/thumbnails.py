@@ -0,0 +1,239 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as thumbnail_defaults
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE, KVStore as CachedDBKVStore,
+)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core.timing import timed
+from . import feeds
+from .models import Post, Rendition
+
+logger = logging.getLogger(__name__)
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+}
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def options(image_format):
+    return dict(settings.POST_THUMBNAIL_OPTIONS, format=image_format)
+
+
+def renditions():
+    """Все варианты картинки поста: пары (размер, формат)."""
+    return [
+        (geometry, image_format)
+        for image_format in settings.POST_IMAGE_FORMATS
+        for geometry in settings.POST_THUMBNAIL_SIZES
+    ]
+
+
+def width(geometry):
+    return int(geometry.split('x')[0])
+
+
+def generate(post):
+    """Создает все варианты картинки поста, записывает их в key-value
+    store sorl, чтобы шаблоны брали их готовыми, и сохраняет вес
+    каждого варианта рядом с весом исходного файла."""
+    # cards импортирует этот модуль, поэтому импорт здесь
+    from .cards import forget_cards
+
+    source_size = post.image.size
+    rows = []
+    for geometry, image_format in renditions():
+        with timed('thumbnails'):
+            thumbnail = get_thumbnail(
+                post.image, geometry, **options(image_format)
+            )
+        rows.append(Rendition(
+            post=post,
+            geometry=geometry,
+            format=image_format,
+            size=thumbnail.storage.size(thumbnail.name),
+            source_size=source_size,
+        ))
+    with transaction.atomic():
+        Rendition.objects.filter(post=post).delete()
+        Rendition.objects.bulk_create(rows)
+    # карточка и ETag ленты могли появиться, пока вариантов еще не было
+    forget_cards(post)
+    feeds.bump_post_feeds(post.group_id, post.author_id)
+
+
+def _generate_for_post(post_id):
+    close_old_connections()
+    try:
+        post = Post.objects.only(
+            'image', 'updated', 'group', 'author').get(pk=post_id)
+        if post.image:
+            generate(post)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры поста %s', post_id)
+    finally:
+        close_old_connections()
+
+
+def _submit(post_id):
+    if not settings.THUMBNAIL_WORKERS:
+        # фоновые потоки отключены: создаем миниатюры сразу
+        _generate_for_post(post_id)
+        return
+    _get_executor().submit(_generate_for_post, post_id)
+
+
+def schedule(post):
+    """Ставит создание миниатюр поста в фоновую очередь после
+    фиксации транзакции, в которой пост сохранен."""
+    if not post.image:
+        return
+    post_id = post.pk
+    transaction.on_commit(lambda: _submit(post_id))
+
+
+def thumbnail_key(image, geometry, image_format):
+    """Ключ миниатюры в key-value store, вычисленный так же, как
+    в ThumbnailBackend.get_thumbnail, но без обращения к хранилищу."""
+    backend = default.backend
+    source = ImageFile(image)
+    thumbnail_options = options(image_format)
+    for key, value in backend.default_options.items():
+        thumbnail_options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(thumbnail_defaults, attr):
+            thumbnail_options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(
+        source, geometry, thumbnail_options
+    )
+    return add_prefix(ImageFile(name, default.storage).key)
+
+
+def _get_many_raw(keys):
+    """Значения key-value store для списка ключей: один get_many кэша
+    и один запрос к БД за промахами."""
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBKVStore):
+        return {key: kvstore._get_raw(key) for key in keys}
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(KVStoreModel.objects.filter(
+            key__in=missing).values_list('key', 'value'))
+        kvstore.cache.set_many(
+            {key: found.get(key, EMPTY_VALUE) for key in missing},
+            thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT,
+        )
+        values.update(found)
+    return {
+        key: value for key, value in values.items()
+        if value is not None and value != EMPTY_VALUE
+    }
+
+
+def attach_thumbnails(posts):
+    """Кладет в post.thumbnails готовые варианты картинки
+    {(размер, формат): миниатюра}, а в post.thumbnail - самый крупный
+    вариант запасного формата (или None) для всех постов разом."""
+    keys = {
+        (post.pk, rendition): thumbnail_key(post.image, *rendition)
+        for post in posts if post.image
+        for rendition in renditions()
+    }
+    values = _get_many_raw(list(keys.values())) if keys else {}
+    main = (settings.POST_THUMBNAIL_SIZES[0], settings.POST_IMAGE_FORMATS[-1])
+    for post in posts:
+        post.thumbnails = {}
+        for rendition in renditions():
+            value = values.get(keys.get((post.pk, rendition)))
+            if value:
+                post.thumbnails[rendition] = deserialize_image_file(value)
+        post.thumbnail = post.thumbnails.get(main)
+
+
+def _srcset(post, image_format):
+    return ', '.join(
+        f'{post.thumbnails[geometry, image_format].url} {width(geometry)}w'
+        for geometry in settings.POST_THUMBNAIL_SIZES
+        if (geometry, image_format) in post.thumbnails
+    )
+
+
+def rendered_size(post, geometry):
+    """Размеры <img> для варианта geometry. С обрезкой (crop) миниатюра
+    ровно равна geometry; без нее картинка вписывается в geometry по
+    размерам исходника из полей поста."""
+    box_width, box_height = (int(value) for value in geometry.split('x'))
+    if (settings.POST_THUMBNAIL_OPTIONS.get('crop')
+            or not post.image_width or not post.image_height):
+        return box_width, box_height
+    scale = min(box_width / post.image_width, box_height / post.image_height)
+    return round(post.image_width * scale), round(post.image_height * scale)
+
+
+def picture(post, create=True):
+    """Данные для <picture>: <source> для каждого формата, кроме
+    запасного, и src/srcset для <img> в запасном формате, а также
+    размеры и цвет-заглушка из полей поста.
+
+    Пока варианты не созданы в фоне, основной размер создается сразу,
+    а если create=False (ленты), вместо него выводится размытое превью
+    или, если превью нет (пост загружен без сигналов), исходный файл по
+    ссылке: страницы лент никогда не открывают файлы картинок."""
+    if not post.image:
+        return None
+    if not hasattr(post, 'thumbnails'):
+        attach_thumbnails([post])
+    *formats, fallback = settings.POST_IMAGE_FORMATS
+    geometry = settings.POST_THUMBNAIL_SIZES[0]
+    if post.thumbnail is None and create:
+        try:
+            with timed('thumbnails'):
+                post.thumbnail = get_thumbnail(
+                    post.image, geometry, **options(fallback)
+                )
+        except Exception:
+            logger.exception('Не удалось создать миниатюру поста %s', post.pk)
+            return None
+        post.thumbnails[geometry, fallback] = post.thumbnail
+    if post.thumbnail is not None:
+        src = post.thumbnail.url
+    else:
+        src = post.image_placeholder or post.image.url
+    image_width, image_height = rendered_size(post, geometry)
+    return {
+        'sources': [
+            {'type': MIME_TYPES[image_format],
+             'srcset': _srcset(post, image_format)}
+            for image_format in formats
+            if _srcset(post, image_format)
+        ],
+        'src': src,
+        'srcset': _srcset(post, fallback),
+        'width': image_width,
+        'height': image_height,
+        'color': post.image_color,
+        'placeholder': post.image_placeholder,
+    }
@@ -0,0 +1,181 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Q
+
+from . import feeds
+from .models import Follow, Post, TimelineEntry, UserStats
+
+logger = logging.getLogger(__name__)
+BATCH_SIZE: int = 500
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.TIMELINE_WORKERS,
+            thread_name_prefix='timeline',
+        )
+    return _executor
+
+
+def _bulk_insert(entries):
+    """Пишет записи ленты пачками, не загружая их все в память."""
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, BATCH_SIZE))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def is_pull_author(author):
+    """У автора слишком много подписчиков для рассылки при записи:
+    его посты подмешиваются в ленту при чтении."""
+    return UserStats.objects.filter(user=author, pulled=True).exists()
+
+
+def pull_authors(user):
+    """id авторов из подписок user, чьи посты читаются при запросе."""
+    return Follow.objects.filter(
+        user=user, author__stats__pulled=True
+    ).values('author')
+
+
+def fan_out(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    if is_pull_author(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author=post.author_id
+    ).values_list('user', flat=True).iterator()
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post.pk)
+        for user_id in followers
+    )
+
+
+def backfill(user, author):
+    """Заполняет ленту user постами автора после подписки."""
+    if is_pull_author(author):
+        return
+    posts = Post.objects.filter(
+        author=author
+    ).values_list('pk', flat=True).iterator()
+    _bulk_insert(
+        TimelineEntry(user_id=user.pk, post_id=post_id)
+        for post_id in posts
+    )
+
+
+def _insert_select(follows, using):
+    """Записывает в ленты посты авторов из подписок follows одним
+    INSERT ... SELECT."""
+    connection = connections[using]
+    select, params = follows.filter(
+        author__posts__isnull=False,
+    ).values_list('user', 'author__posts').query.sql_with_params()
+    table = connection.ops.quote_name(TimelineEntry._meta.db_table)
+    columns = ', '.join(
+        connection.ops.quote_name(TimelineEntry._meta.get_field(name).column)
+        for name in ('user', 'post')
+    )
+    sql = '{} {} ({}) {} {}'.format(
+        connection.ops.insert_statement(ignore_conflicts=True),
+        table, columns, select,
+        connection.ops.ignore_conflicts_suffix_sql(ignore_conflicts=True),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def rebuild(using='default'):
+    """Заполняет ленты всех подписок - после загрузки данных без
+    сигналов (posts/loader.py)."""
+    _insert_select(
+        Follow.objects.using(using).exclude(author__stats__pulled=True),
+        using,
+    )
+
+
+def reset_pulled(using='default'):
+    """Заново отмечает авторов, читающихся при запросе, по числу
+    подписчиков - после загрузки данных без сигналов."""
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    stats = UserStats.objects.using(using)
+    stats.filter(followers_count__gt=limit).update(pulled=True)
+    stats.filter(followers_count__lte=limit).update(pulled=False)
+
+
+def follower_joined(author):
+    """Вызывается после подписки: автор, у которого подписчиков стало
+    больше TIMELINE_FANOUT_LIMIT, перестает рассылать посты."""
+    UserStats.objects.filter(
+        user=author, pulled=False,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).update(pulled=True)
+
+
+def _can_push(author):
+    return UserStats.objects.filter(
+        user=author, pulled=True,
+        followers_count__lt=settings.TIMELINE_PUSH_LIMIT,
+    )
+
+
+def push_author(author):
+    """Переносит посты автора, написанные без рассылки, в ленты его
+    подписчиков и снова включает для него рассылку. Флаг и записи лент
+    меняются в одной транзакции, так что лента не теряет постов."""
+    with transaction.atomic():
+        if not _can_push(author).update(pulled=False):
+            # уже перенесено или подписчиков снова прибавилось
+            return
+        followers = Follow.objects.filter(author=author)
+        _insert_select(followers, 'default')
+    feeds.bump_follow_feeds(followers.values_list('user', flat=True))
+
+
+def _push_in_background(author):
+    close_old_connections()
+    try:
+        push_author(author)
+    except Exception:
+        logger.exception('Не удалось перенести посты автора %s', author)
+    finally:
+        close_old_connections()
+
+
+def _submit(author):
+    if not settings.TIMELINE_WORKERS:
+        push_author(author)
+        return
+    _get_executor().submit(_push_in_background, author)
+
+
+def follower_left(author):
+    """Вызывается после отписки от автора. Когда подписчиков у
+    читающегося при запросе автора становится меньше
+    TIMELINE_PUSH_LIMIT, его посты переносятся в ленты в фоне (до тех
+    пор они подмешиваются при чтении), иначе они пропали бы из лент."""
+    if _can_push(author).exists():
+        transaction.on_commit(lambda: _submit(author))
+
+
+def prune(user, author):
+    """Убирает посты автора из ленты user после отписки."""
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def timeline_posts(user):
+    """Лента подписок: материализованные записи плюс посты
+    авторов с большим числом подписчиков."""
+    return Post.objects.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('post'))
+        | Q(author__in=pull_authors(user))
+    )
@@ -7,6 +7,8 @@ app_name = 'space_posts'
 urlpatterns = [
     # path('', cache(60)(views.index), name='posts'),
     path('', views.index, name='posts'),
+    path('search/', views.search_posts, name='search'),
+    path('export/<str:table>/', views.export_table, name='export'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
@@ -1,17 +1,23 @@
 from .models import Post, Group, User, Follow
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.http import condition
 from .forms import PostForm, CommentForm
 from django.contrib.auth.decorators import login_required
+from core.db import replica_reads
+from . import counters, etags, export, feeds, search, thumbnails
+from .paginators import get_page_obj
+from .timeline import timeline_posts
 
 N_EXEMPLE: int = 10
 
 
+@replica_reads
+@condition(etag_func=etags.index)
 def index(request):
     post_list = Post.objects.all().select_related('author', 'group')
-    paginator = Paginator(post_list, N_EXEMPLE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_page_obj(request, post_list, N_EXEMPLE, feeds.INDEX)
     context = {
         'page_obj': page_obj,
         'index': True
@@ -19,12 +25,27 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@replica_reads
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    posts, next_cursor = search.search(
+        query, N_EXEMPLE, request.GET.get('cursor')
+    )
+    context = {
+        'query': query,
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@replica_reads
+@condition(etag_func=etags.group)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('author', 'group')
-    paginator = Paginator(posts, N_EXEMPLE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_page_obj(
+        request, posts, N_EXEMPLE, feeds.group_feed(group.pk))
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -32,44 +53,37 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@replica_reads
+@condition(etag_func=etags.profile)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
     posts = Post.objects.filter(
         author=author).select_related('author', 'group')
-    number_posts = posts.count()
-    paginator = Paginator(posts, N_EXEMPLE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    following = False
-    if request.user.is_authenticated:
-        following = (Follow.objects.filter(user=request.user).filter(
-            author=author).exists())
-    user_is_author = request.user == author
+    number_posts = counters.posts_count(author)
+    page_obj = get_page_obj(
+        request, posts, N_EXEMPLE, feeds.profile_feed(author.pk))
     context = {
         'username': username,
         'number_posts': number_posts,
         'page_obj': page_obj,
         'author': author,
-        'following': following,
-        'user_is_author': user_is_author,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@replica_reads
+@condition(etag_func=etags.post)
 def post_detail(request, post_id):
-    user_request = request.user
-    post = get_object_or_404(Post, id=post_id)
-    posts = Post.objects.filter(author=post.author)
-    number_posts = posts.count()
-    can_edit = user_request == post.author
-    comments = post.comments.all()
-    form = CommentForm(request.POST or None)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id)
+    number_posts = counters.posts_count(post.author)
+    thumbnails.attach_thumbnails([post])
+    comments = post.comments.select_related('author')
     context = {
         'post': post,
         'number_posts': number_posts,
         'post_id': post_id,
-        'can_edit': can_edit,
-        'form': form,
         'comments': comments,
     }
     return render(request, 'posts/post_detail.html', context)
@@ -83,6 +97,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = user
         post.save()
+        thumbnails.schedule(post)
         return redirect(f'/profile/{user}/')
     context = {
         'form': form,
@@ -100,6 +115,8 @@ def post_edit(request, post_id):
         instance=post)
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect(f'/posts/{post_id}/')
     context = {
         'form': form,
@@ -124,11 +141,14 @@ def add_comment(request, post_id):
 
 
 @login_required
+@replica_reads
+@condition(etag_func=etags.follow)
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, N_EXEMPLE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = timeline_posts(request.user).select_related('author', 'group')
+    page_obj = get_page_obj(
+        request, post_list, N_EXEMPLE,
+        feeds.follow_feed(request.user.pk), depends=(feeds.INDEX,),
+    )
     context = {
         'page_obj': page_obj,
         'follow': True
@@ -153,3 +173,27 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('/follow/')
+
+
+@staff_member_required
+def export_table(request, table):
+    fmt = request.GET.get('format', 'jsonl')
+    if table not in export.TABLES or fmt not in export.FORMATS:
+        return HttpResponseBadRequest('Неизвестная таблица или формат')
+    since = request.GET.get('since')
+    try:
+        since = export.parse_since(since) if since else None
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    compress = request.GET.get('gzip') == '1'
+    filename = f'{table}.{fmt}'
+    if compress:
+        filename += '.gz'
+    response = StreamingHttpResponse(
+        export.stream(table, fmt, since, compress),
+        content_type=(
+            'application/gzip' if compress else export.CONTENT_TYPES[fmt]
+        ),
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
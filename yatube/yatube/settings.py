@@ -11,6 +11,9 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
+
+from core.cache import cache_from_url
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -54,13 +57,20 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.ReadYourWritesMiddleware',
+    'posts.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # после XFrameOptionsMiddleware: каркас из кэша получает те же
+    # заголовки безопасности, что и отрисованная страница
+    'posts.middleware.PageShellMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -90,12 +100,49 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# соединения живут между запросами (секунд); перед запросом core/db.py
+# проверяет, что они отвечают
+CONN_MAX_AGE = int(os.environ.get('YATUBE_CONN_MAX_AGE', 60))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
     }
 }
+# PRAGMA каждого нового соединения SQLite (core/db.py): WAL, чтобы
+# читатели не ждали писателя, и ожидание блокировки вместо
+# "database is locked"
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # в КиБ, если отрицательное: 64 МиБ на соединение
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': int(os.environ.get('YATUBE_SQLITE_BUSY_TIMEOUT', 5000)),
+}
+
+# Реплики только для чтения - файлы SQLite через запятую, например
+# YATUBE_REPLICAS=/var/lib/yatube/replica1.sqlite3,/var/lib/yatube/r2.sqlite3;
+# локально их обновляет команда sync_replicas. С реплик читают ленты и
+# страницы постов (core/db.py)
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+        filter(None, os.environ.get('YATUBE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+# сколько секунд после записи пользователь читает с основной базы
+READ_YOUR_WRITES_SECONDS = int(
+    os.environ.get('YATUBE_READ_YOUR_WRITES_SECONDS', 5)
+)
 
 
 # Password validation
@@ -135,6 +182,18 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# имена с хэшем содержимого и копии .gz/.br (core/static.py)
+STATICFILES_STORAGE = 'core.static.CompressedManifestStorage'
+# раздавать STATIC_ROOT из приложения (core/middleware.py); выключить,
+# если статику отдает фронтенд-сервер
+SERVE_STATIC = os.environ.get('YATUBE_SERVE_STATIC', '1') == '1'
+# без collectstatic ссылаться на файлы по исходным именам (разработка,
+# тесты); в рабочем режиме (DEBUG = False) забытый collectstatic -
+# ошибка, а не тихая раздача без хэшей и кэширования
+STATIC_MANIFEST_STRICT = not DEBUG
+# срок кэширования файлов с хэшем в имени: год
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'space_posts:posts'
@@ -147,12 +206,75 @@ INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
+# запуск тестов (manage.py test или pytest)
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
+# доля запросов с заголовком Server-Timing и строкой в логе
+# yatube.timing (core/middleware.py); 0 выключает замеры совсем.
+# В тестах по умолчанию 0: случайные строки лога не мешают выводу
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.environ.get(
+        'YATUBE_SERVER_TIMING_SAMPLE_RATE', 0 if TESTING else 0.01
+    )
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Общий для всех процессов кэш задается переменной окружения, например
+# YATUBE_CACHE_URL=file:///var/tmp/yatube_cache или
+# YATUBE_CACHE_URL=memcached://127.0.0.1:11211 (см. core/cache.py);
+# по умолчанию - кэш в памяти процесса
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': '127.0.0.1:8000',
-    }
+    'default': cache_from_url(
+        os.environ.get('YATUBE_CACHE_URL', 'locmem://127.0.0.1:8000')
+    ),
 }
+# время жизни закэшированных номерных страниц лент, секунд
+FEED_PAGE_TIMEOUT = int(os.environ.get('YATUBE_FEED_PAGE_TIMEOUT', 60))
+# время жизни целых страниц в кэше (posts/middleware.py), секунд;
+# 0 выключает кэш страниц
+PAGE_CACHE_TIMEOUT = int(os.environ.get('YATUBE_PAGE_CACHE_TIMEOUT', 300))
+# сколько секунд прокси перед сайтом может отдавать гостям страницу,
+# не спрашивая сайт (s-maxage)
+PAGE_CACHE_PROXY_MAX_AGE = int(
+    os.environ.get('YATUBE_PAGE_CACHE_PROXY_MAX_AGE', 10)
+)
+
+# Авторы, у которых подписчиков больше этого числа, не рассылают посты
+# по лентам при публикации: их посты подмешиваются в ленту при чтении
+TIMELINE_FANOUT_LIMIT = 1000
+# и снова рассылают их, только когда подписчиков стало меньше этого
+# числа: подписка и отписка на границе не перекладывают ленты
+TIMELINE_PUSH_LIMIT = TIMELINE_FANOUT_LIMIT * 9 // 10
+# 0 - переносить посты в ленты сразу, в том же запросе
+TIMELINE_WORKERS = int(os.environ.get('YATUBE_TIMELINE_WORKERS', 1))
+
+# начиная с этого числа строк админка показывает примерное число
+# записей из статистики СУБД, а не COUNT(*) (core/db.py)
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Миниатюры картинок постов, создаваемые заранее в фоне (posts/thumbnails.py)
+POST_THUMBNAIL_SIZES = ('900x450', '600x300', '300x150')
+POST_THUMBNAIL_OPTIONS = {'crop': 'top', 'upscale': True}
+# Форматы вариантов картинки: браузер берет первый поддерживаемый,
+# последний - запасной для <img>. AVIF можно добавить первым, если
+# Pillow и sorl-thumbnail собраны с его поддержкой
+POST_IMAGE_FORMATS = ('WEBP', 'JPEG')
+# 0 - создавать миниатюры сразу, в том же запросе
+THUMBNAIL_WORKERS = int(os.environ.get('YATUBE_THUMBNAIL_WORKERS', 2))
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 